@@ -1,5 +1,15 @@
-from django.contrib import admin
-from .models import Entreprise, Compte
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR
+from django.core.paginator import Paginator
+from django.http import HttpResponseRedirect
+from django.db.models import Sum
+from django.utils.functional import cached_property
+from .models import Entreprise, Compte, EntrepriseUsage, DEFAULT_GROUPS
+from .pagination import estimated_count
+from .quotas import ROLE_SEATS, SEAT_FIELDS, QuotaExceeded
+from .search import search_comptes
 from django.contrib.auth.admin import UserAdmin
 
 from django import forms
@@ -8,12 +18,109 @@ from django.utils.translation import gettext_lazy as _
 
 # Register your models here.
 
+###################################################
+# Mode grandes tables (Compte, Entreprise)         #
+###################################################
+class EstimatedCountPaginator(Paginator):
+    """Total de la liste non filtrée estimé par PostgreSQL au-delà de SKT_ADMIN_ESTIMATED_COUNT_MIN lignes."""
+
+    @cached_property
+    def count(self):
+        threshold = getattr(settings, "SKT_ADMIN_ESTIMATED_COUNT_MIN", 10000)
+        if threshold is None:
+            return super().count
+        return estimated_count(self.object_list, threshold)
+
+
+class EntrepriseFilter(admin.SimpleListFilter):
+    """
+    Filtre par entreprise allégé : seules les plus grandes entreprises (synthèse EntrepriseUsage)
+    et l'entreprise sélectionnée sont proposées. Toute entreprise reste accessible par ?entreprise=<IDEntreprise>.
+    """
+    title = _("entreprise")
+    parameter_name = "entreprise"
+    limit = 20
+
+    def lookups(self, request, model_admin):
+        ids = list(
+            EntrepriseUsage.objects.values("Usage_IDEntreprise")
+            .annotate(n=Sum("Usage_Total"))
+            .order_by("-n")
+            .values_list("Usage_IDEntreprise", flat=True)[:self.limit]
+        )
+        if self.value() and self.value().isdigit():
+            ids.append(int(self.value()))
+        return [
+            (str(pk), name)
+            for pk, name in Entreprise.objects.filter(pk__in=ids)
+            .order_by("Entreprise_Name")
+            .values_list("pk", "Entreprise_Name")
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        try:
+            return queryset.filter(Compte_IDEntreprise_id=int(self.value()))
+        except ValueError:
+            raise IncorrectLookupParameters(_("Identifiant d'entreprise invalide."))
+
+
+class RoleFilter(admin.SimpleListFilter):
+    """Filtre sur le rôle dénormalisé (User.role), sans jointure sur les groupes."""
+    title = _("rôle")
+    parameter_name = "role"
+
+    def lookups(self, request, model_admin):
+        return [(name, name) for name in DEFAULT_GROUPS]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(role=self.value())
+        return queryset
+
+
+class LicenceValideFilter(admin.SimpleListFilter):
+    """Filtre sur la validité de la licence, calculée en SQL (index idx_entreprise_licence)."""
+    title = _("licence valide")
+    parameter_name = "licence_valide"
+
+    def lookups(self, request, model_admin):
+        return (("1", _("Oui")), ("0", _("Non")))
+
+    def queryset(self, request, queryset):
+        if self.value() == "1":
+            return queryset.valid_licences()
+        if self.value() == "0":
+            return queryset.exclude(pk__in=Entreprise.objects.valid_licences().values("pk"))
+        return queryset
+
+
 @admin.register(Entreprise)
 class EntrepriseAdmin(admin.ModelAdmin):
     list_display = ("IDEntreprise", "Entreprise_Name", "Entreprise_Licence_Statut",
-                    "Entreprise_Licence_Date_Start", "Entreprise_Licence_Date_End")
+                    "Entreprise_Licence_Date_Start", "Entreprise_Licence_Date_End", "utilisation")
     search_fields = ("Entreprise_Name",)
-    list_filter = ("Entreprise_Licence_Statut",)
+    list_filter = ("Entreprise_Licence_Statut", LicenceValideFilter)
+    # Compteurs de places en lecture seule : tenus par les réservations (SKT_account.quotas)
+    readonly_fields = ("utilisation",) + Entreprise.SEAT_COUNTERS
+    ordering = ("IDEntreprise",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # Synthèse d'utilisation chargée en une requête pour toute la page
+        return super().get_queryset(request).prefetch_related("usage")
+
+    @admin.display(description=_("Utilisation (actifs / comptes / autorisés)"))
+    def utilisation(self, obj):
+        usage = {row.Usage_Role: row for row in obj.usage.all()}
+        parts = []
+        for role, kind in ROLE_SEATS.items():
+            row = usage.get(role)
+            allow = getattr(obj, SEAT_FIELDS[kind][1])
+            parts.append(f"{role} : {row.Usage_Active if row else 0} / {row.Usage_Total if row else 0} / {allow}")
+        return " · ".join(parts)
 
 
 class CompteCreationForm(forms.ModelForm):
@@ -55,9 +162,18 @@ class CompteAdmin(UserAdmin):
     form = CompteChangeForm
     model = Compte
 
-    # Ce qui s’affiche dans la liste admin
+    # Ce qui s’affiche dans la liste admin (entreprise jointe dans la même requête)
     list_display = ("username", "email", "Compte_IDEntreprise", "is_staff", "is_active")
-    list_filter = ("is_staff", "is_active", "Compte_IDEntreprise", "groups")
+    list_select_related = ("Compte_IDEntreprise",)
+    list_filter = ("is_staff", "is_active", EntrepriseFilter, RoleFilter)
+
+    # Mode grandes tables : total estimé, pas de second COUNT(*) sur la table entière
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # Formulaire : recherche à la demande au lieu de charger toutes les entreprises, groupes et permissions
+    autocomplete_fields = ("Compte_IDEntreprise", "groups")
+    raw_id_fields = ("user_permissions",)
 
     # Groupes de champs (édition)
     fieldsets = (
@@ -71,6 +187,15 @@ class CompteAdmin(UserAdmin):
         (_("Dates importantes"), {"fields": ("last_login", "date_joined")}),
     )
 
+    def changeform_view(self, request, object_id=None, form_url="", extra_context=None):
+        # Places réservées par les signaux dans la transaction de l'admin : quota atteint,
+        # tout est annulé et le formulaire est réaffiché avec le message
+        try:
+            return super().changeform_view(request, object_id, form_url, extra_context)
+        except QuotaExceeded as e:
+            self.message_user(request, e.messages[0], messages.ERROR)
+            return HttpResponseRedirect(request.get_full_path())
+
     # Groupes de champs (création)
     add_fieldsets = (
         (None, {
@@ -84,5 +209,17 @@ class CompteAdmin(UserAdmin):
         }),
     )
 
-    search_fields = ("username", "email", "first_name", "last_name")
-    ordering = ("username",)
+    # Recherche indexée (voir SKT_account.search) à la place des icontains sur chaque champ
+    search_fields = ("email", "first_name", "last_name")
+    search_help_text = _("Email, prénom ou nom (3 caractères minimum).")
+    # Tri sur la clé primaire (indexée) : les plus récents d'abord
+    ordering = ("-pk",)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        results = search_comptes(search_term, queryset)
+        # Classement par pertinence, sauf tri explicite sur une colonne
+        if ORDER_VAR in request.GET:
+            results = results.order_by(*queryset.query.order_by)
+        return results, False
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SkmAccountConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'SKT_account'
+
+    def ready(self):
+        # Enregistrement des receivers (invalidation des caches, etc.)
+        from . import signals  # noqa: F401
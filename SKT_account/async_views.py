@@ -0,0 +1,74 @@
+"""
+Versions asynchrones des vues de connexion et de création d'utilisateur.
+
+Servies par skillteam/asgi.py (uvicorn, daphne...) quand SKT_ASYNC_VIEWS est actif :
+les accès à la base passent par l'ORM asynchrone, sans thread par requête.
+Les réponses sont identiques à celles des vues synchrones de views.py.
+"""
+from django.shortcuts import render
+from django.core.exceptions import PermissionDenied
+from django.utils.translation import gettext_lazy as _
+from django.contrib.auth import aauthenticate, alogin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib import messages
+
+from .forms import UserCreateForm
+from .backends import get_primary_group, get_compte
+from .hashing import HasherSaturated
+from .views import check_licence, role_response, service_unavailable, page_context
+from .pagination import aadmin_users_page, aentreprises_page, apage_version
+from .ratelimit import login_ratelimit
+
+
+@staff_member_required
+async def create_user_view(request):
+    """
+    Vue protégée : seuls les membres du staff peuvent créer un utilisateur.
+    """
+    if request.method == "POST":
+        form = UserCreateForm(request.POST)
+        if await form.ais_valid():
+            try:
+                user = await form.asave()
+            except HasherSaturated:
+                return service_unavailable()
+            messages.success(request, f"Utilisateur créé : {user.email}")
+            return render(request, "users_manage.html", page_context(await apage_version("users"), await aadmin_users_page()))
+    else:
+        form = UserCreateForm()
+
+    return render(request, "create_user.html", {"form": form})
+
+
+@login_ratelimit
+async def connectionHandler(request) :
+
+    #récupération de l'utilisateur connecté
+    email = request.POST.get('username')
+    pwd = request.POST.get('password')
+    try:
+        user = await aauthenticate(request, username = email, password = pwd)
+    except HasherSaturated:
+        return service_unavailable()
+
+    #vérification de l'authenification
+    if not user :
+        raise PermissionDenied(_("Utilisateur non authentifié."))
+
+    #si c'est un SuperAdministrateur
+    if user.is_authenticated and user.is_staff and user.is_active :
+        await alogin(request, user)
+        return render(request, 'users_manage.html', page_context(await apage_version('users'), await aadmin_users_page()))
+
+    # nom du groupe principal (déjà chargé par le backend d'authentification)
+    role = get_primary_group(user)
+
+    #si c'est un Administrateur
+    if user.is_authenticated and role=="Administrator" and user.is_active :
+        await alogin(request, user)
+        return render(request, 'entreprises_manage.html', page_context(await apage_version('entreprises'), await aentreprises_page()))
+
+    check_licence(get_compte(user))
+
+    #traitement en fonction du groupe de l'utilisateur
+    return role_response(request, user, role)
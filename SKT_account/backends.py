@@ -0,0 +1,119 @@
+"""
+Backend d'authentification de la page de connexion.
+
+Une seule requête SQL charge l'utilisateur, son extension Compte, l'Entreprise
+de rattachement et le nom de son groupe principal. La vue de connexion réutilise
+ensuite ces données sans nouvel aller-retour vers la base.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import ObjectDoesNotExist
+
+from . import hashing
+from .permissions import cached_permissions
+from .sessions import get_cached_user, aget_cached_user
+
+
+def login_user_queryset(email):
+    """
+    Requête unique de chargement de l'utilisateur ``email`` avec
+    ``user.compte`` et ``user.compte.Compte_IDEntreprise`` (jointures).
+    Le groupe principal est lu dans la colonne dénormalisée ``user.role``.
+    """
+    UserModel = get_user_model()
+    return (
+        UserModel._default_manager
+        .filter(**{UserModel.USERNAME_FIELD: email})
+        .select_related("compte__Compte_IDEntreprise")
+    )
+
+
+def load_login_user(email):
+    """Charge l'utilisateur ``email`` (voir login_user_queryset), ou None s'il n'existe pas."""
+    return login_user_queryset(email).first()
+
+
+async def aload_login_user(email):
+    """Version asynchrone de load_login_user()."""
+    return await login_user_queryset(email).afirst()
+
+
+def get_primary_group(user):
+    """Nom du groupe principal de l'utilisateur, sans requête (colonne dénormalisée)."""
+    return user.role or None
+
+
+def get_compte(user):
+    """Extension Compte de l'utilisateur (ou None), sans requête si déjà jointe."""
+    try:
+        return user.compte
+    except ObjectDoesNotExist:
+        return None
+
+
+class LoginBackend(ModelBackend):
+    """ModelBackend dont la recherche de l'utilisateur passe par load_login_user()."""
+
+    def _username(self, username, kwargs):
+        if username is None:
+            username = kwargs.get(get_user_model().USERNAME_FIELD)
+        return username
+
+    def _cached_permissions(self, user_obj, obj, from_name, compute):
+        # Permissions partagées entre les requêtes (voir permissions.py) ; ModelBackend les garde sur l'instance
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        cache_name = f"_{from_name}_perm_cache"
+        if not hasattr(user_obj, cache_name):
+            setattr(user_obj, cache_name, cached_permissions(user_obj, from_name, lambda: compute(user_obj)))
+        return getattr(user_obj, cache_name)
+
+    def get_user_permissions(self, user_obj, obj=None):
+        return self._cached_permissions(user_obj, obj, "user", super().get_user_permissions)
+
+    def get_group_permissions(self, user_obj, obj=None):
+        return self._cached_permissions(user_obj, obj, "group", super().get_group_permissions)
+
+    async def aget_user_permissions(self, user_obj, obj=None):
+        return await sync_to_async(self.get_user_permissions)(user_obj, obj)
+
+    async def aget_group_permissions(self, user_obj, obj=None):
+        return await sync_to_async(self.get_group_permissions)(user_obj, obj)
+
+    def get_user(self, user_id):
+        # Utilisateur de la session servi depuis le cache (voir sessions.py)
+        return get_cached_user(user_id, super().get_user)
+
+    async def aget_user(self, user_id):
+        return await aget_cached_user(user_id, super().aget_user)
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        username = self._username(username, kwargs)
+        if username is None or password is None:
+            return None
+
+        user = load_login_user(username)
+        if user is None:
+            # Hachage à vide pour ne pas révéler l'existence du compte par le temps de réponse
+            hashing.make_password(password)
+            return None
+
+        # Vérification du mot de passe dans le pool de hachage (HasherSaturated si saturé)
+        if hashing.check_user_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        username = self._username(username, kwargs)
+        if username is None or password is None:
+            return None
+
+        user = await aload_login_user(username)
+        if user is None:
+            await hashing.amake_password(password)
+            return None
+
+        if await hashing.acheck_user_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
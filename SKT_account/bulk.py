@@ -0,0 +1,57 @@
+"""
+Création en masse de comptes (Compte) : utilisé par les commandes import_comptes et generate_fixtures.
+
+bulk_create refuse l'héritage multi-table : les lignes User sont créées par bulk_create,
+puis les lignes Compte par une insertion directe, puis les appartenances aux groupes.
+bulk_create n'émet aucun signal : le rôle dénormalisé (User.role) doit être renseigné par l'appelant,
+les places des entreprises (quotas), la synthèse d'utilisation (EntrepriseUsage) et les listes de
+gestion (totaux, versions) sont mises à jour ici.
+"""
+from django.db import connection
+
+from . import quotas, usage
+from .pagination import bump_page_version, invalidate_count
+from .models import Compte, User
+
+
+def insert_comptes(values):
+    """Insère les lignes Compte ``(user_id, entreprise_id)`` dont la ligne User parente existe déjà."""
+    opts = Compte._meta
+    qn = connection.ops.quote_name
+    image = opts.get_field("Compte_Image")
+    columns = [
+        opts.pk.column,
+        opts.get_field("Compte_IDEntreprise").column,
+        image.column,
+    ]
+    sql = "INSERT INTO {} ({}) VALUES (%s, %s, %s)".format(
+        qn(opts.db_table), ", ".join(qn(c) for c in columns)
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(user_id, entreprise_id, image.default) for user_id, entreprise_id in values])
+
+
+def bulk_create_comptes(users, entreprise_ids, group_ids, batch_size=None, reserve=True):
+    """
+    Crée les comptes ``users`` (instances User non enregistrées), rattachés aux entreprises
+    ``entreprise_ids`` et aux groupes ``group_ids`` (listes alignées sur ``users``).
+    Réserve les places correspondantes (QuotaExceeded si un plafond serait dépassé), sauf si
+    ``reserve`` est faux (compteurs déjà renseignés par l'appelant).
+    À appeler dans une transaction. Retourne les instances User créées.
+    """
+    changes = usage.deltas(
+        [], [(entreprise_id, user.role, user.is_active) for user, entreprise_id in zip(users, entreprise_ids)]
+    )
+    if reserve:
+        quotas.apply_deltas(changes)
+    users = User.objects.bulk_create(users, batch_size=batch_size)
+    insert_comptes([(user.pk, entreprise_id) for user, entreprise_id in zip(users, entreprise_ids)])
+    Membership = User.groups.through
+    Membership.objects.bulk_create(
+        [Membership(user_id=user.pk, group_id=group_id) for user, group_id in zip(users, group_ids)],
+        batch_size=batch_size,
+    )
+    usage.apply(changes)
+    invalidate_count("admin_users")
+    bump_page_version("users")
+    return users
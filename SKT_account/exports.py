@@ -0,0 +1,115 @@
+"""
+Exports complets des comptes et des entreprises (CSV ou JSONL), en flux.
+
+Les lignes sont lues par QuerySet.iterator(chunk_size=...) (curseur serveur sous
+PostgreSQL) et écrites au fil de l'eau : la mémoire reste constante quel que soit
+le nombre de lignes, et le premier octet part dès le premier lot. Seules les colonnes
+exportées sont chargées (values_list, jointure sur l'entreprise dans la même requête).
+Utilisé par les vues export_*_view et la commande export_data.
+"""
+import csv
+import json
+
+from django.conf import settings
+
+from .models import Compte, DEFAULT_GROUPS, Entreprise
+
+
+FORMATS = ("csv", "jsonl")
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+
+# (colonne exportée, champ lu en base)
+COMPTE_COLUMNS = (
+    ("id", "pk"),
+    ("email", "email"),
+    ("first_name", "first_name"),
+    ("last_name", "last_name"),
+    ("role", "role"),
+    ("is_active", "is_active"),
+    ("date_joined", "date_joined"),
+    ("last_login", "last_login"),
+    ("entreprise_id", "Compte_IDEntreprise_id"),
+    ("entreprise", "Compte_IDEntreprise__Entreprise_Name"),
+    ("licence_statut", "Compte_IDEntreprise__Entreprise_Licence_Statut"),
+)
+
+ENTREPRISE_COLUMNS = (
+    ("id", "IDEntreprise"),
+    ("name", "Entreprise_Name"),
+    ("licence_statut", "Entreprise_Licence_Statut"),
+    ("licence_start", "Entreprise_Licence_Date_Start"),
+    ("licence_end", "Entreprise_Licence_Date_End"),
+    ("customer_allow", "Entreprise_Num_Customer_Allow"),
+    ("customer_create", "Entreprise_Num_Customer_Create"),
+    ("user_allow", "Entreprise_Num_User_Allow"),
+    ("user_create", "Entreprise_Num_User_Create"),
+    ("supervisor_allow", "Entreprise_Num_Supervisor_Allow"),
+    ("supervisor_create", "Entreprise_Num_Supervisor_Create"),
+    ("group_allow", "Entreprise_Num_Group_Allow"),
+    ("group_create", "Entreprise_Num_Group_Create"),
+)
+
+
+def _chunk_size():
+    return getattr(settings, "SKT_EXPORT_CHUNK_SIZE", 2000)
+
+
+def _check_statut(statut):
+    if statut and statut not in Entreprise.LicenceStatut.values:
+        raise ValueError(f"Statut de licence inconnu : {statut}")
+
+
+def compte_rows(statut=None, role=None):
+    """Comptes (avec leur entreprise), filtrés par statut de licence et/ou rôle. Retourne (entêtes, lignes)."""
+    _check_statut(statut)
+    if role and role not in DEFAULT_GROUPS:
+        raise ValueError(f"Rôle inconnu : {role}")
+    queryset = Compte.objects.order_by("pk")
+    if statut:
+        queryset = queryset.filter(Compte_IDEntreprise__Entreprise_Licence_Statut=statut)
+    if role:
+        queryset = queryset.filter(role=role)
+    return _rows(queryset, COMPTE_COLUMNS)
+
+
+def entreprise_rows(statut=None):
+    """Entreprises et leurs licences, filtrées par statut de licence. Retourne (entêtes, lignes)."""
+    _check_statut(statut)
+    queryset = Entreprise.objects.order_by("pk")
+    if statut:
+        queryset = queryset.filter(Entreprise_Licence_Statut=statut)
+    return _rows(queryset, ENTREPRISE_COLUMNS)
+
+
+def _rows(queryset, columns):
+    header = [name for name, _field in columns]
+    rows = queryset.values_list(*(field for _name, field in columns)).iterator(chunk_size=_chunk_size())
+    return header, rows
+
+
+class _Echo:
+    """Pseudo-fichier pour csv.writer : write() renvoie la ligne au lieu de la stocker."""
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    return "" if value is None else value
+
+
+def render(fmt, header, rows):
+    """Générateur de lignes de texte au format ``fmt`` (csv ou jsonl)."""
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow([_csv_value(value) for value in row])
+    elif fmt == "jsonl":
+        for row in rows:
+            yield json.dumps(dict(zip(header, row)), ensure_ascii=False, default=str) + "\n"
+    else:
+        raise ValueError(f"Format inconnu : {fmt}")
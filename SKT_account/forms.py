@@ -6,7 +6,9 @@ from django.core.exceptions import ValidationError
 from django.contrib.auth.models import Group
 from django.utils.translation import gettext_lazy as _
 from .models import Entreprise
+from . import hashing
 
+User = get_user_model()
 
 
 # Formulaire de création d'un utilisateur
@@ -23,9 +25,12 @@ class UserCreateForm(forms.Form):
     password1 = forms.CharField(label=_("Mot de passe"), widget=forms.PasswordInput, required=True)
     password2 = forms.CharField(label=_("Confirmation du mot de passe"), widget=forms.PasswordInput, required=True)
     
+    # Vérification de l'unicité de l'email en base (désactivée par ais_valid, qui la fait en asynchrone)
+    check_email_exists = True
+
     def clean_email(self):
         email = self.cleaned_data['email'].strip().lower()
-        if User.objects.filter(email=email).exists():
+        if self.check_email_exists and User.objects.filter(email=email).exists():
             raise ValidationError("Un utilisateur avec cet email existe déjà.")
         return email
 
@@ -48,17 +53,16 @@ class UserCreateForm(forms.Form):
         Crée l'utilisateur et ajoute au groupe 'Administrator'
         Retourne l'instance User créée.
         """
-        email = self.cleaned_data['email']
-        password = self.cleaned_data['password1']
-        first_name = self.cleaned_data["first_name"].strip()
-        last_name = self.cleaned_data["last_name"].strip()
-
-        user = User.objects.create_user(email=email, password=password)
-        
-        # Identité
-        user.first_name = first_name
-        user.last_name = last_name
-
+        # Hachage dans le pool de hachage, hors du worker web
+        encoded = hashing.make_password(self.cleaned_data['password1'])
+
+        # Identité et mot de passe renseignés avant l'enregistrement : un seul INSERT
+        user = User(
+            email=User.objects.normalize_email(self.cleaned_data['email']),
+            first_name=self.cleaned_data["first_name"].strip(),
+            last_name=self.cleaned_data["last_name"].strip(),
+            password=encoded,
+        )
         user.save()
 
         group, _ = Group.objects.get_or_create(name="Administrator")
@@ -66,6 +70,33 @@ class UserCreateForm(forms.Form):
 
         return user
 
+    async def ais_valid(self):
+        """Version asynchrone de is_valid() : la seule requête (unicité de l'email) passe par l'ORM asynchrone."""
+        self.check_email_exists = False
+        if not self.is_valid():
+            return False
+        if await User.objects.filter(email=self.cleaned_data['email']).aexists():
+            self.add_error("email", ValidationError("Un utilisateur avec cet email existe déjà."))
+            return False
+        return True
+
+    async def asave(self):
+        """Version asynchrone de save()."""
+        encoded = await hashing.amake_password(self.cleaned_data['password1'])
+
+        user = User(
+            email=User.objects.normalize_email(self.cleaned_data['email']),
+            first_name=self.cleaned_data["first_name"].strip(),
+            last_name=self.cleaned_data["last_name"].strip(),
+            password=encoded,
+        )
+        await user.asave()
+
+        group, _ = await Group.objects.aget_or_create(name="Administrator")
+        await user.groups.aadd(group)
+
+        return user
+
 
 # Formulaire de création d'une entreprise
 class EntrepriseForm(forms.ModelForm):
@@ -82,22 +113,8 @@ class EntrepriseForm(forms.ModelForm):
     def clean(self):
         cleaned = super().clean()
 
-        # Règles: created <= allow pour chaque couple
-        couples = [
-            ("Entreprise_Num_Customer_Create", "Entreprise_Num_Customer_Allow", "clients"),
-            ("Entreprise_Num_User_Create", "Entreprise_Num_User_Allow", "utilisateurs"),
-            ("Entreprise_Num_Supervisor_Create", "Entreprise_Num_Supervisor_Allow", "superviseurs"),
-            ("Entreprise_Num_Group_Create", "Entreprise_Num_Group_Allow", "groupes"),
-        ]
-
-        for created_field, allow_field, label in couples:
-            created = cleaned.get(created_field)
-            allow = cleaned.get(allow_field)
-            if created is not None and allow is not None and created > allow:
-                self.add_error(
-                    created_field,
-                    f"Le nombre créé ({created}) ne peut pas dépasser le nombre autorisé ({allow}) pour les {label}."
-                )
+        # Plafonds : vérifiés par Entreprise.clean() contre les places déjà réservées. Les compteurs
+        # *_Create ne font pas partie du formulaire (tenus par SKT_account.quotas)
 
         # (Optionnel) Si statut ≠ ACTIVE, on peut exiger une date de fin
         statut = cleaned.get("Entreprise_Licence_Statut")
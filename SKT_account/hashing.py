@@ -0,0 +1,167 @@
+"""
+Hachage des mots de passe dans un pool de processus.
+
+Le hachage PBKDF2 est purement CPU : le répartir sur plusieurs processus permet
+d'exploiter tous les cœurs. Les fonctions exécutées dans les processus fils sont
+définies ici, dans un module sans import de modèles, pour rester utilisables
+avec la méthode de démarrage « spawn » (Windows, macOS).
+
+Pour les requêtes web, un pool partagé par processus (``SKT_HASHER_WORKERS``)
+limite le nombre de hachages en attente (``SKT_HASHER_MAX_PENDING``) : au-delà,
+HasherSaturated est levée immédiatement plutôt que de bloquer le worker WSGI.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+class HasherSaturated(Exception):
+    """Trop de hachages en attente : la requête doit être rejetée (503)."""
+
+
+def _init_worker(settings_module):
+    # Les processus fils démarrés en « spawn » n'ont pas Django initialisé
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+    django.setup()
+
+
+def _make_password(password):
+    from django.contrib.auth.hashers import make_password
+    return make_password(password)
+
+
+def _check_password(password, encoded):
+    """Retourne (mot de passe correct, nouveau hachage si l'algorithme doit être mis à jour)."""
+    from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+    if not check_password(password, encoded):
+        return False, None
+    try:
+        must_update = identify_hasher(encoded).must_update(encoded)
+    except ValueError:
+        must_update = False
+    return True, make_password(password) if must_update else None
+
+
+def hasher_pool(workers=None):
+    """Crée un pool de processus prêt à hacher des mots de passe."""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "skillteam.settings"),),
+    )
+
+
+def hash_passwords(pool, passwords, chunksize=16):
+    """Hache une liste de mots de passe avec le pool ``pool`` (ordre conservé)."""
+    return list(pool.map(_make_password, passwords, chunksize=chunksize))
+
+
+##########################################
+# Pool partagé pour les requêtes web     #
+##########################################
+_lock = threading.Lock()
+_pool = None
+_pending = None
+
+
+def _shared_pool():
+    """Pool du processus courant, créé à la première utilisation (donc après un éventuel fork)."""
+    global _pool, _pending
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                workers = getattr(settings, "SKT_HASHER_WORKERS", os.cpu_count())
+                _pending = threading.BoundedSemaphore(
+                    getattr(settings, "SKT_HASHER_MAX_PENDING", 4 * workers)
+                )
+                _pool = hasher_pool(workers)
+    return _pool
+
+
+def _timeout():
+    return getattr(settings, "SKT_HASHER_TIMEOUT", 5)
+
+
+def _submit(fn, *args):
+    """
+    Soumet ``fn(*args)`` au pool partagé si une place est libre (HasherSaturated sinon).
+    La place est rendue à la fin du calcul ou à son annulation, pas au retour de la requête :
+    un calcul abandonné après le délai occupe sa place tant qu'il reste dans la file du pool.
+    """
+    pool = _shared_pool()
+    if not _pending.acquire(blocking=False):
+        raise HasherSaturated()
+    try:
+        future = pool.submit(fn, *args)
+    except BaseException:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _future: _pending.release())
+    return future
+
+
+def _run(fn, *args):
+    # Sans pool configuré (développement, tests) : exécution dans le processus courant
+    if not getattr(settings, "SKT_HASHER_WORKERS", os.cpu_count()):
+        return fn(*args)
+
+    future = _submit(fn, *args)
+    try:
+        return future.result(timeout=_timeout())
+    except FuturesTimeoutError:
+        # Calcul retiré de la file s'il n'a pas démarré ; la requête est rejetée (503)
+        future.cancel()
+        raise HasherSaturated()
+
+
+async def _arun(fn, *args):
+    # Version asynchrone de _run() : la boucle d'événements n'est jamais bloquée
+    if not getattr(settings, "SKT_HASHER_WORKERS", os.cpu_count()):
+        return await sync_to_async(fn, thread_sensitive=False)(*args)
+
+    future = _submit(fn, *args)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=_timeout())
+    except asyncio.TimeoutError:
+        future.cancel()
+        raise HasherSaturated()
+
+
+def make_password(password):
+    """Équivalent de django.contrib.auth.hashers.make_password, exécuté dans le pool."""
+    return _run(_make_password, password)
+
+
+def check_user_password(user, password):
+    """
+    Équivalent de user.check_password(password), exécuté dans le pool.
+    Comme Django, met à jour le hachage en base si l'algorithme a changé.
+    """
+    if not user.has_usable_password():
+        return False
+    ok, new_encoded = _run(_check_password, password, user.password)
+    if ok and new_encoded:
+        user.password = new_encoded
+        user.save(update_fields=["password"])
+    return ok
+
+
+async def amake_password(password):
+    """Version asynchrone de make_password()."""
+    return await _arun(_make_password, password)
+
+
+async def acheck_user_password(user, password):
+    """Version asynchrone de check_user_password()."""
+    if not user.has_usable_password():
+        return False
+    ok, new_encoded = await _arun(_check_password, password, user.password)
+    if ok and new_encoded:
+        user.password = new_encoded
+        await user.asave(update_fields=["password"])
+    return ok
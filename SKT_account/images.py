@@ -0,0 +1,123 @@
+"""
+Traitement des images de profil (Compte.Compte_Image).
+
+Chaque image envoyée est normalisée en WebP compressé (comme les *_compressed.webp de
+SKT_account/static/images), accompagnée de miniatures de taille fixe, et enregistrée
+sous le nom de son empreinte SHA-256 : deux images identiques partagent le même fichier.
+Le traitement est fait hors du cycle de la requête, dans un pool de threads,
+après le commit de la transaction qui a enregistré le compte.
+"""
+import hashlib
+import io
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+
+from .models import Compte
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = "SKM_Pictures/Profile"
+DEFAULT_IMAGE = f"{PROFILE_DIR}/default.png"
+PROCESSED_RE = re.compile(rf"^{PROFILE_DIR}/[0-9a-f]{{64}}\.webp$")
+
+_executor = None
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def is_processed(name):
+    """Vrai si l'image est l'image par défaut ou a déjà été normalisée."""
+    return not name or name == DEFAULT_IMAGE or bool(PROCESSED_RE.match(name))
+
+
+def thumbnail_name(name, size):
+    """Nom de la miniature ``size`` d'une image normalisée."""
+    digest = name.rsplit("/", 1)[-1].removesuffix(".webp")
+    return f"{PROFILE_DIR}/thumbs/{digest}_{size}.webp"
+
+
+def _webp(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, format="WEBP", quality=quality, method=6)
+    return buffer.getvalue()
+
+
+def normalize(data):
+    """
+    Image brute -> (octets WebP de l'image, {taille: octets WebP de la miniature}).
+    L'orientation EXIF est appliquée et les métadonnées supprimées.
+    """
+    from PIL import Image, ImageOps
+
+    quality = _setting("SKT_PROFILE_WEBP_QUALITY", 80)
+    max_size = _setting("SKT_PROFILE_IMAGE_MAX", 512)
+
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+
+    thumbs = {
+        size: _webp(ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS), quality)
+        for size in _setting("SKT_PROFILE_THUMB_SIZES", (64, 128))
+    }
+    return _webp(image, quality), thumbs
+
+
+def process_profile_image(compte_id):
+    """Normalise l'image de profil d'un compte ; sans effet si elle l'est déjà."""
+    compte = Compte.objects.filter(pk=compte_id).only("Compte_Image").first()
+    if compte is None or is_processed(compte.Compte_Image.name):
+        return None
+
+    field = compte.Compte_Image
+    storage = field.storage
+    original = field.name
+    with field.open("rb") as f:
+        data = f.read()
+
+    image, thumbs = normalize(data)
+    name = f"{PROFILE_DIR}/{hashlib.sha256(image).hexdigest()}.webp"
+
+    # Déduplication : le fichier n'est écrit que s'il n'existe pas déjà
+    if not storage.exists(name):
+        storage.save(name, ContentFile(image))
+    for size, content in thumbs.items():
+        thumb = thumbnail_name(name, size)
+        if not storage.exists(thumb):
+            storage.save(thumb, ContentFile(content))
+
+    # update() : pas de post_save, donc pas de nouveau traitement ; seulement si l'image n'a pas changé entre-temps
+    Compte.objects.filter(pk=compte_id, Compte_Image=original).update(Compte_Image=name)
+
+    # Suppression de l'original s'il n'est plus référencé
+    if not Compte.objects.filter(Compte_Image=original).exists():
+        storage.delete(original)
+    return name
+
+
+def _run(compte_id):
+    try:
+        process_profile_image(compte_id)
+    except Exception:
+        logger.exception("Échec du traitement de l'image de profil du compte %s", compte_id)
+    finally:
+        close_old_connections()
+
+
+def schedule(compte_id):
+    """Traitement en arrière-plan (ou immédiat si SKT_IMAGE_WORKERS = 0)."""
+    global _executor
+    workers = _setting("SKT_IMAGE_WORKERS", 2)
+    if not workers:
+        return _run(compte_id)
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="skt-images")
+    _executor.submit(_run, compte_id)
@@ -0,0 +1,43 @@
+"""
+État des licences Entreprise.
+
+Calculé sur l'entreprise déjà chargée (jointe à l'utilisateur par LoginBackend) : aucune
+requête supplémentaire. La même règle existe en SQL (models.licence_valid_q) pour les
+filtres et le balayage des expirations.
+"""
+from collections import namedtuple
+
+from django.utils import timezone
+
+from .models import Entreprise
+
+
+# valid   : la licence autorise la connexion aujourd'hui
+# defined : l'entreprise possède une date de début de licence
+# until   : date à partir de laquelle l'état doit être recalculé (None = jamais)
+LicenceState = namedtuple("LicenceState", ["valid", "defined", "until"])
+
+
+def compute_licence_state(entreprise, today=None):
+    """Calcule l'état de la licence d'une entreprise pour la date ``today``."""
+    today = today or timezone.now().date()
+    start = entreprise.Entreprise_Licence_Date_Start
+    end = entreprise.Entreprise_Licence_Date_End
+
+    if start is None:
+        return LicenceState(False, False, None)
+
+    # La licence n'est pas active : l'état ne change qu'à la prochaine sauvegarde
+    if entreprise.Entreprise_Licence_Statut != Entreprise.LicenceStatut.ACTIVE:
+        return LicenceState(False, True, None)
+
+    # La période de licence n'a pas démarré : valide à partir de la date de début
+    if start > today:
+        return LicenceState(False, True, start)
+
+    # La période de licence est finie
+    if end is not None and end <= today:
+        return LicenceState(False, True, None)
+
+    return LicenceState(True, True, end)
+
@@ -0,0 +1,43 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from SKT_account import exports
+from SKT_account.models import DEFAULT_GROUPS, Entreprise
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporte en flux les comptes (avec entreprise et rôle) ou les entreprises (licences) "
+        "au format CSV ou JSONL, sur la sortie standard ou dans un fichier."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=["comptes", "entreprises"], help="Données à exporter")
+        parser.add_argument("--format", choices=exports.FORMATS, default="csv",
+                            help="Format de sortie (défaut : csv)")
+        parser.add_argument("--statut", choices=Entreprise.LicenceStatut.values,
+                            help="Filtre sur le statut de licence de l'entreprise")
+        parser.add_argument("--role", choices=DEFAULT_GROUPS,
+                            help="Filtre sur le rôle des comptes (comptes uniquement)")
+        parser.add_argument("--output", "-o", help="Fichier de sortie (défaut : sortie standard)")
+
+    def handle(self, *args, **options):
+        if options["kind"] == "comptes":
+            header, rows = exports.compte_rows(statut=options["statut"], role=options["role"])
+        else:
+            if options["role"]:
+                raise CommandError("--role ne s'applique qu'à l'export des comptes")
+            header, rows = exports.entreprise_rows(statut=options["statut"])
+
+        out = open(options["output"], "w", encoding="utf-8", newline="") if options["output"] else sys.stdout
+        try:
+            n = -1 if options["format"] == "csv" else 0
+            for line in exports.render(options["format"], header, rows):
+                out.write(line)
+                n += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if options["output"]:
+            self.stdout.write(self.style.SUCCESS(f"{n} lignes exportées dans {options['output']}"))
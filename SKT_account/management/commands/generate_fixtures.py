@@ -0,0 +1,179 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from SKT_account.bulk import bulk_create_comptes
+from SKT_account.models import Entreprise, User, DEFAULT_GROUPS
+from SKT_account.pagination import bump_page_version, invalidate_count
+from SKT_account.quotas import ROLE_SEATS, SEAT_FIELDS
+
+
+# Plafond maximal de chaque compteur *_Allow (validateurs de Entreprise)
+SEAT_MAX = {"customer": 999, "user": 99999, "supervisor": 9999, "group": 9999}
+
+LICENCE_STATES = ("active", "expired", "future", "disabled", "archived")
+
+
+def parse_mix(value, allowed):
+    """ "SKT_User=70,Customer=20" -> {"SKT_User": 70, "Customer": 20} """
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in allowed:
+            raise CommandError(f"Valeur inconnue : {name} (attendu : {', '.join(allowed)})")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise CommandError(f"Poids invalide pour {name} : {weight}")
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère un jeu de données de montée en charge : entreprises avec des licences variées "
+        "et comptes répartis entre les groupes. Déterministe pour une même graine (--seed)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entreprises", type=int, default=1000, help="Nombre d'entreprises")
+        parser.add_argument("--users", type=int, default=100000, help="Nombre de comptes")
+        parser.add_argument("--role-mix", default="SKT_User=80,Customer=12,Supervisor=6,Administrator=2",
+                            help="Répartition des comptes par groupe (poids)")
+        parser.add_argument("--licence-mix", default="active=80,expired=8,future=2,disabled=6,archived=4",
+                            help="Répartition des entreprises par état de licence (poids)")
+        parser.add_argument("--seed", type=int, default=42, help="Graine du générateur aléatoire")
+        parser.add_argument("--prefix", default="fx", help="Préfixe des noms et emails générés")
+        parser.add_argument("--password", default="Fixtures-2024!", help="Mot de passe commun à tous les comptes")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Lignes insérées par requête")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        n_entreprises = options["entreprises"]
+        n_users = options["users"]
+        prefix = options["prefix"]
+        batch_size = options["batch_size"]
+        if n_entreprises < 1:
+            raise CommandError("--entreprises doit être ≥ 1")
+
+        role_mix = parse_mix(options["role_mix"], DEFAULT_GROUPS)
+        licence_mix = parse_mix(options["licence_mix"], LICENCE_STATES)
+        groups = dict(Group.objects.filter(name__in=DEFAULT_GROUPS).values_list("name", "id"))
+        if User.objects.filter(email__startswith=f"{prefix}-").exists():
+            raise CommandError(f"Des comptes « {prefix}-… » existent déjà : utiliser un autre --prefix")
+
+        start = time.perf_counter()
+
+        # Rôle de chaque compte, puis répartition entre les entreprises dans la limite des plafonds
+        roles = rng.choices(list(role_mix), weights=list(role_mix.values()), k=n_users)
+        assignment, seats = self._assign(rng, roles, n_entreprises)
+
+        # Un seul hachage, partagé par tous les comptes
+        encoded = make_password(options["password"])
+
+        with transaction.atomic():
+            entreprises = self._create_entreprises(rng, n_entreprises, seats, licence_mix, prefix, batch_size)
+            entreprise_ids = [e.pk for e in entreprises]
+            self.stdout.write(f"{len(entreprises)} entreprises créées")
+
+            for offset in range(0, n_users, batch_size):
+                chunk = range(offset, min(offset + batch_size, n_users))
+                bulk_create_comptes(
+                    [
+                        User(email=f"{prefix}-{i}@fixtures.skillteam", password=encoded, role=roles[i],
+                             first_name=f"Prénom{i}", last_name=f"Nom{i}")
+                        for i in chunk
+                    ],
+                    [entreprise_ids[assignment[i]] for i in chunk],
+                    [groups[roles[i]] for i in chunk],
+                    reserve=False,
+                )
+                self.stdout.write(f"{chunk.stop} comptes créés")
+
+        invalidate_count("entreprises")
+        invalidate_count("admin_users")
+        bump_page_version("entreprises")
+        bump_page_version("users")
+        self.stdout.write(self.style.SUCCESS(
+            f"Jeu de données généré en {time.perf_counter() - start:.1f} s"
+        ))
+
+    def _assign(self, rng, roles, n_entreprises):
+        """
+        Entreprise (indice) de chaque compte, et places consommées par entreprise.
+        Les comptes qui consomment des places ne dépassent jamais le plafond du compteur.
+        """
+        seats = [dict.fromkeys(SEAT_FIELDS, 0) for _ in range(n_entreprises)]
+        weights = [rng.random() for _ in range(n_entreprises)]
+        candidates = list(range(n_entreprises))
+        assignment = rng.choices(candidates, weights=weights, k=len(roles))
+
+        for i, role in enumerate(roles):
+            kind = ROLE_SEATS.get(role)
+            if kind is None:
+                continue
+            idx = assignment[i]
+            if seats[idx][kind] >= SEAT_MAX[kind]:
+                # Entreprise pleine : première entreprise suivante disposant d'une place
+                for step in range(1, n_entreprises):
+                    other = (idx + step) % n_entreprises
+                    if seats[other][kind] < SEAT_MAX[kind]:
+                        idx = assignment[i] = other
+                        break
+                else:
+                    raise CommandError(f"Pas assez d'entreprises pour placer tous les comptes « {role} »")
+            seats[idx][kind] += 1
+        return assignment, seats
+
+    def _create_entreprises(self, rng, n, seats, licence_mix, prefix, batch_size):
+        today = timezone.now().date()
+        states = rng.choices(list(licence_mix), weights=list(licence_mix.values()), k=n)
+        objs = []
+        for i, (state, used) in enumerate(zip(states, seats)):
+            fields = {}
+            for kind, (created, allow) in SEAT_FIELDS.items():
+                # Compteur cohérent avec les comptes générés (pas de réservation compte par compte),
+                # plafond avec une marge aléatoire
+                fields[created] = used[kind]
+                fields[allow] = min(SEAT_MAX[kind], used[kind] + rng.randint(0, 50))
+
+            end = None
+            statut = Entreprise.LicenceStatut.ACTIVE
+            if state == "active":
+                end = rng.choice([None, today + timedelta(days=rng.randint(1, 730))])
+            elif state == "expired":
+                end = today - timedelta(days=rng.randint(1, 365))
+            elif state == "disabled":
+                statut = Entreprise.LicenceStatut.DISABLED
+                end = today - timedelta(days=rng.randint(0, 365))
+            elif state == "archived":
+                statut = Entreprise.LicenceStatut.ARCHIVED
+                end = today - timedelta(days=rng.randint(365, 1500))
+
+            objs.append(Entreprise(
+                Entreprise_Name=f"{prefix} Entreprise {i}",
+                Entreprise_Licence_Statut=statut,
+                Entreprise_Licence_Date_End=end,
+                **fields,
+            ))
+        objs = Entreprise.objects.bulk_create(objs, batch_size=batch_size)
+
+        # Date de début forcée à aujourd'hui par auto_now_add : recalage en deux UPDATE
+        future = [e.pk for e, state in zip(objs, states) if state == "future"]
+        Entreprise.objects.filter(pk__in=future).update(
+            Entreprise_Licence_Date_Start=today + timedelta(days=30)
+        )
+        Entreprise.objects.filter(pk__in=[e.pk for e in objs], Entreprise_Licence_Date_End__isnull=False).exclude(
+            pk__in=future
+        ).update(Entreprise_Licence_Date_Start=Least(
+            F("Entreprise_Licence_Date_End") - timedelta(days=365), Value(today)
+        ))
+        return objs
@@ -0,0 +1,145 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from SKT_account.bulk import bulk_create_comptes
+from SKT_account.hashing import hasher_pool, hash_passwords
+from SKT_account.models import Entreprise, User, DEFAULT_GROUPS
+from SKT_account.quotas import QuotaExceeded
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe des comptes (Compte) depuis un fichier CSV ou JSONL. "
+        "Colonnes : email, password, first_name, last_name, entreprise, role."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Fichier CSV ou JSONL à importer")
+        parser.add_argument("--format", choices=["csv", "jsonl"],
+                            help="Format du fichier (déduit de l'extension par défaut)")
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Nombre de comptes insérés par lot (défaut : 500)")
+        parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                            help="Nombre de processus de hachage des mots de passe")
+        parser.add_argument("--entreprise", type=int,
+                            help="IDEntreprise utilisé quand la colonne 'entreprise' est absente")
+        parser.add_argument("--role", choices=DEFAULT_GROUPS, default="SKT_User",
+                            help="Groupe utilisé quand la colonne 'role' est absente")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"Fichier introuvable : {path}")
+        fmt = options["format"] or ("jsonl" if path.suffix in (".jsonl", ".json") else "csv")
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size doit être ≥ 1")
+
+        self.default_entreprise = options["entreprise"]
+        self.default_role = options["role"]
+        self.groups = dict(Group.objects.filter(name__in=DEFAULT_GROUPS).values_list("name", "id"))
+
+        created = skipped = 0
+        start = time.perf_counter()
+        with path.open(encoding="utf-8", newline="") as f, hasher_pool(options["workers"]) as pool:
+            # (numéro de ligne de données, ligne) : les erreurs désignent la ligne fautive
+            rows = enumerate(self._read(f, fmt), start=1)
+            while batch := list(islice(rows, batch_size)):
+                n_created, n_skipped = self._import_batch(batch, pool)
+                created += n_created
+                skipped += n_skipped
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"{created} comptes créés, {skipped} ignorés "
+                    f"({created / elapsed:.0f} comptes/s)"
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Import terminé : {created} comptes créés, {skipped} ignorés "
+            f"en {time.perf_counter() - start:.1f} s"
+        ))
+
+    def _read(self, f, fmt):
+        """Lecture en flux du fichier, ligne par ligne."""
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _normalize(self, line, row):
+        email = (row.get("email") or "").strip().lower()
+        if not email:
+            raise CommandError(f"Ligne {line} sans email : {row}")
+        entreprise = row.get("entreprise") or self.default_entreprise
+        if not entreprise:
+            raise CommandError(f"Ligne {line} : aucune entreprise pour {email} (utiliser --entreprise)")
+        try:
+            entreprise = int(entreprise)
+        except (TypeError, ValueError):
+            raise CommandError(f"Ligne {line} : identifiant d'entreprise invalide pour {email} : {entreprise!r}")
+        role = row.get("role") or self.default_role
+        if role not in self.groups:
+            raise CommandError(f"Ligne {line} : rôle inconnu pour {email} : {role}")
+        return {
+            "line": line,
+            "email": email,
+            "password": row.get("password") or None,
+            "first_name": (row.get("first_name") or "").strip(),
+            "last_name": (row.get("last_name") or "").strip(),
+            "entreprise": entreprise,
+            "role": role,
+        }
+
+    def _import_batch(self, batch, pool):
+        rows = {}
+        for line, raw in batch:
+            row = self._normalize(line, raw)
+            rows.setdefault(row["email"], row)
+
+        # Entreprises du lot vérifiées en une requête : un identifiant inconnu est signalé avec
+        # sa ligne, avant toute insertion (sinon IntegrityError ou faux « quota dépassé »)
+        entreprise_ids = {row["entreprise"] for row in rows.values()}
+        known = set(Entreprise.objects.filter(pk__in=entreprise_ids).values_list("pk", flat=True))
+        for row in rows.values():
+            if row["entreprise"] not in known:
+                raise CommandError(
+                    f"Ligne {row['line']} : entreprise {row['entreprise']} introuvable pour {row['email']}"
+                )
+
+        # Les comptes déjà présents sont ignorés (une requête par lot)
+        existing = set(User.objects.filter(email__in=rows).values_list("email", flat=True))
+        rows = [row for email, row in rows.items() if email not in existing]
+        skipped = len(batch) - len(rows)
+        if not rows:
+            return 0, skipped
+
+        # Hachage parallèle, hors transaction
+        hashes = hash_passwords(pool, [row["password"] for row in rows])
+
+        # Places réservées par entreprise (une requête chacune) dans la même transaction que les insertions
+        try:
+            with transaction.atomic():
+                # Le rôle dénormalisé est renseigné ici : bulk_create n'émet pas m2m_changed
+                users = bulk_create_comptes(
+                    [
+                        User(email=row["email"], password=password, role=row["role"],
+                             first_name=row["first_name"], last_name=row["last_name"])
+                        for row, password in zip(rows, hashes)
+                    ],
+                    [row["entreprise"] for row in rows],
+                    [self.groups[row["role"]] for row in rows],
+                )
+        except QuotaExceeded as e:
+            raise CommandError(f"Quota dépassé pour l'entreprise {e.params['entreprise']}")
+
+        return len(users), skipped
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from SKT_account.images import DEFAULT_IMAGE, is_processed, process_profile_image
+from SKT_account.models import Compte
+
+
+class Command(BaseCommand):
+    help = "Normalise (WebP, miniatures, déduplication) les images de profil pas encore traitées."
+
+    def handle(self, *args, **options):
+        pending = (
+            Compte.objects.exclude(Compte_Image=DEFAULT_IMAGE)
+            .exclude(Compte_Image="")
+            .values_list("pk", "Compte_Image")
+            .iterator(chunk_size=1000)
+        )
+        done = failed = 0
+        for pk, name in pending:
+            if is_processed(name):
+                continue
+            try:
+                process_profile_image(pk)
+                done += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Compte {pk} ({name}) : {e}")
+        self.stdout.write(self.style.SUCCESS(f"{done} images traitées, {failed} en échec."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from SKT_account.quotas import sync_seats
+from SKT_account.usage import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule la synthèse d'utilisation (EntrepriseUsage) depuis les comptes, puis recale "
+        "les compteurs de places des entreprises : toutes, ou celles passées en argument."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("entreprises", nargs="*", type=int,
+                            help="IDEntreprise à recalculer (défaut : toutes)")
+
+    def handle(self, *args, **options):
+        n = rebuild(options["entreprises"] or None)
+        self.stdout.write(self.style.SUCCESS(f"Synthèse recalculée : {n} lignes."))
+        n = sync_seats(options["entreprises"] or None)
+        self.stdout.write(self.style.SUCCESS(f"Compteurs de places recalés : {n} entreprises."))
@@ -0,0 +1,101 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from SKT_account import usage
+from SKT_account.pagination import bump_page_version
+from SKT_account.sessions import invalidate_cached_users
+from SKT_account.models import Entreprise
+
+
+class Command(BaseCommand):
+    help = (
+        "Passe à 'DIS' les entreprises actives dont la licence est expirée "
+        "et désactive leurs comptes. Traitement par lots, relançable sans effet de bord."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500,
+                            help="Nombre d'entreprises traitées par transaction (défaut : 500)")
+        parser.add_argument("--date", help="Date de référence AAAA-MM-JJ (défaut : aujourd'hui)")
+        parser.add_argument("--after", type=int, default=0,
+                            help="Reprendre après cet IDEntreprise")
+        parser.add_argument("--pause", type=float, default=0,
+                            help="Pause en secondes entre deux lots")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Affiche les entreprises concernées sans rien modifier")
+
+    def handle(self, *args, **options):
+        today = parse_date(options["date"]) if options["date"] else timezone.now().date()
+        if today is None:
+            raise CommandError("Format de date invalide (attendu : AAAA-MM-JJ)")
+        chunk_size = options["chunk_size"]
+        if chunk_size < 1:
+            raise CommandError("--chunk-size doit être ≥ 1")
+
+        User = get_user_model()
+        expired = Entreprise.objects.filter(
+            Entreprise_Licence_Statut=Entreprise.LicenceStatut.ACTIVE,
+            Entreprise_Licence_Date_End__lte=today,
+        )
+
+        last = options["after"]
+        total_entreprises = total_users = 0
+        while True:
+            # Pagination par clé : chaque lot repart du dernier IDEntreprise traité
+            ids = list(
+                expired.filter(pk__gt=last).order_by("pk").values_list("pk", flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            last = ids[-1]
+
+            if options["dry_run"]:
+                self.stdout.write(f"{len(ids)} entreprises à désactiver (jusqu'à {last})")
+                total_entreprises += len(ids)
+                continue
+
+            # Transaction courte par lot : les conditions sont relues sous verrou, une entreprise
+            # réactivée entre-temps n'est donc pas touchée, ni ses comptes
+            with transaction.atomic():
+                disabled = list(
+                    expired.filter(pk__in=ids).select_for_update().values_list("pk", flat=True)
+                )
+                n_entreprises = Entreprise.objects.filter(pk__in=disabled).update(
+                    Entreprise_Licence_Statut=Entreprise.LicenceStatut.DISABLED
+                )
+                users = list(User.objects.filter(
+                    compte__Compte_IDEntreprise__in=disabled, is_active=True
+                ).values_list("pk", "compte__Compte_IDEntreprise", "role"))
+                user_ids = [pk for pk, _entreprise, _role in users]
+                n_users = User.objects.filter(pk__in=user_ids).update(is_active=False)
+                usage.apply(usage.deltas(
+                    [(entreprise, role, True) for _pk, entreprise, role in users],
+                    [(entreprise, role, False) for _pk, entreprise, role in users],
+                ))
+
+            # update() n'émet pas post_save : synthèse d'utilisation (ci-dessus) et caches
+            # (utilisateurs, pages de gestion) mis à jour explicitement
+            invalidate_cached_users(user_ids)
+            bump_page_version("entreprises")
+            if user_ids:
+                bump_page_version("users")
+
+            total_entreprises += n_entreprises
+            total_users += n_users
+            self.stdout.write(
+                f"Lot jusqu'à {last} : {n_entreprises} entreprises désactivées, {n_users} comptes désactivés"
+            )
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        if options["dry_run"]:
+            self.stdout.write(f"Simulation : {total_entreprises} entreprises à désactiver.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Terminé : {total_entreprises} entreprises, {total_users} comptes désactivés."
+        ))
@@ -0,0 +1,218 @@
+"""
+Mesures par route : latence, nombre de requêtes SQL et temps passé en base.
+
+MetricsMiddleware agrège les mesures en mémoire, dans chaque processus. Les requêtes
+SQL sont comptées par connection.execute_wrapper. metrics_view les expose au format
+texte Prometheus : chaque worker expose ses propres compteurs, à agréger côté Prometheus.
+L'accès demande le jeton SKT_METRICS_TOKEN (en-tête « Authorization: Bearer … ») : derrière
+le proxy local, REMOTE_ADDR ne distingue pas les clients externes.
+Les requêtes HTTP plus lentes que SKT_METRICS_SLOW_MS sont journalisées avec leurs requêtes SQL les plus lentes.
+"""
+import bisect
+import heapq
+import hmac
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection, connections
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+from skillteam.database import pool_stats
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        if i < len(self.counts):
+            self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, n in zip(self.bounds, self.counts):
+            total += n
+            yield bound, total
+
+
+class Registry:
+    """Compteurs et histogrammes par (route, méthode), protégés par un verrou."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+        self.db_time = defaultdict(float)
+        self.requests = defaultdict(int)
+
+    def record(self, route, method, status, duration, n_queries=None, db_time=None):
+        """Enregistre une requête HTTP ; ``n_queries`` et ``db_time`` à None si non mesurés."""
+        key = (route, method)
+        with self._lock:
+            self.latency[key].observe(duration)
+            if n_queries is not None:
+                self.queries[key].observe(n_queries)
+                self.db_time[key] += db_time
+            self.requests[(route, method, str(status))] += 1
+
+    def render(self):
+        """Export au format texte Prometheus (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            for name, help_text, histograms in (
+                ("skt_http_request_duration_seconds", "Durée de traitement des requêtes HTTP.", self.latency),
+                ("skt_db_queries_per_request", "Nombre de requêtes SQL par requête HTTP.", self.queries),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for (route, method), hist in sorted(histograms.items()):
+                    labels = f'route="{_escape(route)}",method="{method}"'
+                    for bound, total in hist.cumulative():
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {total}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+                    lines.append(f"{name}_sum{{{labels}}} {hist.sum}")
+                    lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+            lines += [
+                "# HELP skt_db_query_duration_seconds_total Temps cumulé passé en base.",
+                "# TYPE skt_db_query_duration_seconds_total counter",
+            ]
+            for (route, method), value in sorted(self.db_time.items()):
+                lines.append(
+                    f'skt_db_query_duration_seconds_total{{route="{_escape(route)}",method="{method}"}} {value}'
+                )
+
+            lines += [
+                "# HELP skt_http_requests_total Nombre de requêtes HTTP par code de réponse.",
+                "# TYPE skt_http_requests_total counter",
+            ]
+            for (route, method, status), value in sorted(self.requests.items()):
+                lines.append(
+                    f'skt_http_requests_total{{route="{_escape(route)}",method="{method}",status="{status}"}} {value}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+
+
+class QueryTimer:
+    """execute_wrapper : compte les requêtes SQL et garde les plus lentes."""
+
+    def __init__(self, keep=5):
+        self.count = 0
+        self.total = 0.0
+        self.keep = keep
+        self.slowest = []  # tas (durée, sql) des ``keep`` requêtes les plus lentes
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.total += duration
+            item = (duration, sql)
+            if len(self.slowest) < self.keep:
+                heapq.heappush(self.slowest, item)
+            elif item > self.slowest[0]:
+                heapq.heapreplace(self.slowest, item)
+
+
+def _route(request):
+    match = getattr(request, "resolver_match", None)
+    # Route du motif d'URL (et non le chemin) pour borner le nombre de séries
+    return match.route if match else "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    À placer en tête de MIDDLEWARE. En mode asynchrone, seule la latence est mesurée :
+    les requêtes SQL s'exécutent alors dans d'autres threads, hors de portée d'execute_wrapper.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow = getattr(settings, "SKT_METRICS_SLOW_MS", 500) / 1000
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - start, timer)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - start, None)
+        return response
+
+    def _record(self, request, response, duration, timer):
+        # timer à None (mode asynchrone) : pas de séries SQL plutôt que des zéros
+        route = _route(request)
+        if timer is None:
+            registry.record(route, request.method, response.status_code, duration)
+            if duration >= self.slow:
+                logger.warning("Requête lente %s %s : %.0f ms", request.method, route, duration * 1000)
+            return
+        registry.record(route, request.method, response.status_code, duration, timer.count, timer.total)
+        if duration >= self.slow:
+            worst = "\n".join(
+                f"  {d * 1000:.1f} ms  {sql[:300]}" for d, sql in sorted(timer.slowest, reverse=True)
+            )
+            logger.warning(
+                "Requête lente %s %s : %.0f ms, %d requêtes SQL (%.0f ms)\n%s",
+                request.method, route, duration * 1000, timer.count, timer.total * 1000, worst,
+            )
+
+
+def render_pool_stats():
+    """Statistiques des pools de connexions à la base (jauges, une par statistique psycopg_pool)."""
+    lines = []
+    for alias, stats in sorted(pool_stats(connections).items()):
+        for name, value in sorted(stats.items()):
+            metric = f"skt_db_pool_{name}"
+            lines += [f"# TYPE {metric} gauge", f'{metric}{{alias="{_escape(alias)}"}} {value}']
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def metrics_view(request):
+    """Export Prometheus, réservé aux porteurs du jeton SKT_METRICS_TOKEN (404 si aucun jeton n'est défini)."""
+    token = getattr(settings, "SKT_METRICS_TOKEN", None)
+    if not token:
+        raise Http404()
+    scheme, _, given = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(given.strip().encode(), token.encode()):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render() + render_pool_stats(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 01:45
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_role(apps, schema_editor):
+    # Rôle = nom du premier groupe de l'utilisateur (par ordre de clé), en une seule requête
+    User = apps.get_model('SKT_account', 'User')
+    Group = apps.get_model('auth', 'Group')
+    primary_group = Group.objects.filter(user=OuterRef('pk')).order_by('pk').values('name')[:1]
+    User.objects.update(role=Coalesce(Subquery(primary_group), Value('')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SKT_account', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='role',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(backfill_role, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='entreprise',
+            name='Entreprise_Num_Customer_Allow',
+            field=models.IntegerField(default=0, error_messages={'blank': 'Le nombre de clients autorisés est requis.', 'invalid': 'Veuillez saisir un entier valide.'}, help_text='Entier compris entre 0 et 999.', validators=[django.core.validators.MinValueValidator(0, message='Le nombre de clients autorisés peut pas être négative (min = 0).'), django.core.validators.MaxValueValidator(999, message='Le nombre de clients autorisés ne peut pas dépasser \u202f999.')]),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-18 01:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SKT_account', '0002_user_role'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entreprise',
+            index=models.Index(fields=['Entreprise_Licence_Statut', 'Entreprise_Licence_Date_Start', 'Entreprise_Licence_Date_End'], name='idx_entreprise_licence'),
+        ),
+        migrations.AddIndex(
+            model_name='entreprise',
+            index=models.Index(condition=models.Q(('Entreprise_Licence_Statut', 'ACT')), fields=['Entreprise_Licence_Date_End', 'Entreprise_Licence_Date_Start'], name='idx_entreprise_licence_active'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.3 on 2026-10-18 01:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_usage(apps, schema_editor):
+    # Synthèse initiale depuis les comptes existants (même calcul que SKT_account.usage.rebuild)
+    Compte = apps.get_model('SKT_account', 'Compte')
+    EntrepriseUsage = apps.get_model('SKT_account', 'EntrepriseUsage')
+    rows = (
+        Compte.objects.order_by()
+        .values('Compte_IDEntreprise_id', 'user_ptr__role')
+        .annotate(total=Count('pk'), active=Count('pk', filter=Q(user_ptr__is_active=True)))
+    )
+    EntrepriseUsage.objects.bulk_create(
+        [
+            EntrepriseUsage(
+                Usage_IDEntreprise_id=row['Compte_IDEntreprise_id'], Usage_Role=row['user_ptr__role'],
+                Usage_Active=row['active'], Usage_Total=row['total'],
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SKT_account', '0003_entreprise_licence_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntrepriseUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('Usage_Role', models.CharField(blank=True, max_length=150)),
+                ('Usage_Active', models.IntegerField(default=0)),
+                ('Usage_Total', models.IntegerField(default=0)),
+                ('Usage_IDEntreprise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='SKT_account.entreprise')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('Usage_IDEntreprise', 'Usage_Role'), name='uniq_usage_entreprise_role')],
+            },
+        ),
+        migrations.RunPython(fill_usage, migrations.RunPython.noop),
+    ]
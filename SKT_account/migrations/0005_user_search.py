@@ -0,0 +1,46 @@
+# Generated by Django 5.2.3 on 2026-10-18 01:58
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+# Index de recherche selon la base (voir SKT_account.search) :
+# PostgreSQL : trigrammes (GIN) sur search_text ; autres bases : index sur LOWER() pour la recherche par préfixe
+PREFIX_FIELDS = ('email', 'first_name', 'last_name')
+
+
+def create_search_indexes(apps, schema_editor):
+    qn = schema_editor.quote_name
+    table = qn(apps.get_model('SKT_account', 'User')._meta.db_table)
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS idx_user_search_trgm ON {table} USING gin (search_text gin_trgm_ops)'
+        )
+    else:
+        for field in PREFIX_FIELDS:
+            schema_editor.execute(f'CREATE INDEX IF NOT EXISTS idx_user_{field}_lower ON {table} (LOWER({qn(field)}))')
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS idx_user_search_trgm')
+    else:
+        for field in PREFIX_FIELDS:
+            schema_editor.execute(f'DROP INDEX IF EXISTS idx_user_{field}_lower')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SKT_account', '0004_entreprise_usage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='search_text',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower(django.db.models.functions.text.Concat('email', models.Value(' '), 'first_name', models.Value(' '), 'last_name')), output_field=models.TextField()),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.3 on 2026-10-18 02:16
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Least
+
+
+# Compteurs de places désormais tenus par SKT_account.quotas : recalage sur les comptes existants
+# (synthèse EntrepriseUsage), les comptes créés jusqu'ici par l'admin n'ayant rien réservé
+SEAT_COUNTERS = {
+    'Customer': ('Entreprise_Num_Customer_Create', 'Entreprise_Num_Customer_Allow'),
+    'SKT_User': ('Entreprise_Num_User_Create', 'Entreprise_Num_User_Allow'),
+    'Supervisor': ('Entreprise_Num_Supervisor_Create', 'Entreprise_Num_Supervisor_Allow'),
+}
+
+
+def sync_seat_counters(apps, schema_editor):
+    Entreprise = apps.get_model('SKT_account', 'Entreprise')
+    EntrepriseUsage = apps.get_model('SKT_account', 'EntrepriseUsage')
+    updates = {}
+    for role, (created, allow) in SEAT_COUNTERS.items():
+        total = EntrepriseUsage.objects.filter(
+            Usage_IDEntreprise=OuterRef('pk'), Usage_Role=role
+        ).values('Usage_Total')[:1]
+        updates[created] = Least(Coalesce(Subquery(total), Value(0)), F(allow))
+    Entreprise.objects.update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SKT_account', '0005_user_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='entreprise',
+            name='Entreprise_Num_Customer_Create',
+            field=models.IntegerField(default=0, editable=False, error_messages={'blank': 'Ce champ est requis.', 'invalid': 'Veuillez saisir un entier valide.'}, help_text='Entier ≥ 0 et ≤ au nombre de clients autorisées ', validators=[django.core.validators.MinValueValidator(0, message='La valeur ne peut pas être négative.')]),
+        ),
+        migrations.AlterField(
+            model_name='entreprise',
+            name='Entreprise_Num_Group_Create',
+            field=models.IntegerField(default=0, editable=False, error_messages={'blank': 'Ce champ est requis.', 'invalid': 'Veuillez saisir un entier valide.'}, help_text='Entier ≥ 0 et ≤ au nombre de groupes autorisés ', validators=[django.core.validators.MinValueValidator(0, message='La valeur ne peut pas être négative.')]),
+        ),
+        migrations.AlterField(
+            model_name='entreprise',
+            name='Entreprise_Num_Supervisor_Create',
+            field=models.IntegerField(default=0, editable=False, error_messages={'blank': 'Ce champ est requis.', 'invalid': 'Veuillez saisir un entier valide.'}, help_text='Entier ≥ 0 et ≤ au nombre de superviseurs autorisés ', validators=[django.core.validators.MinValueValidator(0, message='La valeur ne peut pas être négative.')]),
+        ),
+        migrations.AlterField(
+            model_name='entreprise',
+            name='Entreprise_Num_User_Create',
+            field=models.IntegerField(default=0, editable=False, error_messages={'blank': 'Ce champ est requis.', 'invalid': 'Veuillez saisir un entier valide.'}, help_text="Entier ≥ 0 et ≤ au nombre d'utilisateurs autorisés ", validators=[django.core.validators.MinValueValidator(0, message='La valeur ne peut pas être négative.')]),
+        ),
+        migrations.RunPython(sync_seat_counters, migrations.RunPython.noop),
+    ]
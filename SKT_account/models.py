@@ -2,8 +2,9 @@ from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
-from django.db.models import Q, F, CheckConstraint
-from django.db.models.functions import Length
+from django.db.models import Q, F, CheckConstraint, ExpressionWrapper
+from django.utils import timezone
+from django.db.models.functions import Length, Lower, Concat
 from django.db.models.expressions import RawSQL
 from django.contrib.auth.models import User, Group, AbstractUser, BaseUserManager
 
@@ -58,6 +59,18 @@ class User(AbstractUser):
     username = models.CharField(max_length=150, blank=True, null=True, unique=False)
     email = models.EmailField("email address", unique=True)
 
+    # Groupe principal (premier groupe par ordre de clé, comme groups.first()), dénormalisé
+    # pour éviter la jointure sur auth_user_groups à chaque connexion. Tenu à jour par signals.py.
+    role = models.CharField(max_length=150, blank=True, default="", editable=False)
+
+    # Texte de recherche (email, prénom, nom en minuscules), calculé par la base et indexé
+    # (trigrammes sous PostgreSQL, voir SKT_account.search et la migration 0005)
+    search_text = models.GeneratedField(
+        expression=Lower(Concat("email", models.Value(" "), "first_name", models.Value(" "), "last_name")),
+        output_field=models.TextField(),
+        db_persist=True,
+    )
+
     USERNAME_FIELD = "email"          # email devient l’identifiant
     REQUIRED_FIELDS = []              # pas de champs requis en plus pour createsuperuser
 
@@ -70,6 +83,28 @@ class User(AbstractUser):
 ########################
 # Table des Entreprise #
 ########################
+def licence_valid_q(today):
+    """Condition SQL de validité d'une licence à la date ``today`` (même règle que licence.compute_licence_state)."""
+    return (
+        Q(Entreprise_Licence_Statut="ACT", Entreprise_Licence_Date_Start__lte=today)
+        & (Q(Entreprise_Licence_Date_End__isnull=True) | Q(Entreprise_Licence_Date_End__gt=today))
+    )
+
+
+class EntrepriseQuerySet(models.QuerySet):
+
+    def with_licence_state(self, today=None):
+        """Annote chaque entreprise avec ``licence_valid`` (booléen calculé en SQL)."""
+        today = today or timezone.now().date()
+        return self.annotate(
+            licence_valid=ExpressionWrapper(licence_valid_q(today), output_field=models.BooleanField())
+        )
+
+    def valid_licences(self, today=None):
+        """Entreprises dont la licence est valide à la date ``today`` (filtre indexé)."""
+        return self.filter(licence_valid_q(today or timezone.now().date()))
+
+
 class Entreprise(models.Model) :
     #IDEntreprise est une clè primaire auto-incrémentée
     IDEntreprise = models.AutoField(primary_key = True)
@@ -113,6 +148,7 @@ class Entreprise(models.Model) :
     #Nombre de compte clients créés (entre 0 et le nombre de client autorisés)
     Entreprise_Num_Customer_Create =  models.IntegerField(       
         default=0,
+        editable=False,
         validators=[
             MinValueValidator(0, message=_("La valeur ne peut pas être négative."))
         ],
@@ -140,6 +176,7 @@ class Entreprise(models.Model) :
     #Nombre de compte utilisateurs créés (entre 0 et le nombre d'utilisateurs autorisés)
     Entreprise_Num_User_Create =  models.IntegerField(       
         default=0,
+        editable=False,
         validators=[
             MinValueValidator(0, message=_("La valeur ne peut pas être négative."))
         ],
@@ -167,6 +204,7 @@ class Entreprise(models.Model) :
     #Nombre de compte superviseur créés (entre 0 et le nombre d'utilisateurs autorisés)
     Entreprise_Num_Supervisor_Create =  models.IntegerField(       
         default=0,
+        editable=False,
         validators=[
             MinValueValidator(0, message=_("La valeur ne peut pas être négative."))
         ],
@@ -194,6 +232,7 @@ class Entreprise(models.Model) :
     #Nombre de groupes créés (entre 0 et le nombre de groupes autorisés)
     Entreprise_Num_Group_Create =  models.IntegerField(       
         default=0,
+        editable=False,
         validators=[
             MinValueValidator(0, message=_("La valeur ne peut pas être négative."))
         ],
@@ -204,67 +243,99 @@ class Entreprise(models.Model) :
         help_text=_("Entier ≥ 0 et ≤ au nombre de groupes autorisés ")
     )
 
+    objects = EntrepriseQuerySet.as_manager()
+
+    def __str__(self):
+        return self.Entreprise_Name
+
+    class Meta:
+        indexes = [
+            # Filtrage par état de licence (admin, rapports, balayage des expirations)
+            models.Index(
+                fields=["Entreprise_Licence_Statut", "Entreprise_Licence_Date_Start", "Entreprise_Licence_Date_End"],
+                name="idx_entreprise_licence",
+            ),
+            # Index partiel : uniquement les licences actives, triées par date de fin
+            models.Index(
+                fields=["Entreprise_Licence_Date_End", "Entreprise_Licence_Date_Start"],
+                condition=Q(Entreprise_Licence_Statut="ACT"),
+                name="idx_entreprise_licence_active",
+            ),
+        ]
+
+        # Garde-fous en base : un compteur *_Create ne dépasse jamais son plafond *_Allow,
+        # y compris en cas de réservations concurrentes (voir SKT_account.quotas)
+        constraints = [
+            CheckConstraint(
+                condition=Q(Entreprise_Num_Customer_Allow__gte=0, Entreprise_Num_Customer_Allow__lte=999),
+                name="chk_allow_between_0_and_999",
+            ),
+            CheckConstraint(
+                condition=Q(Entreprise_Num_Customer_Create__gte=0,
+                            Entreprise_Num_Customer_Create__lte=F("Entreprise_Num_Customer_Allow")),
+                name="chk_customer_create_lte_allow",
+            ),
+            CheckConstraint(
+                condition=Q(Entreprise_Num_User_Create__gte=0,
+                            Entreprise_Num_User_Create__lte=F("Entreprise_Num_User_Allow")),
+                name="chk_user_create_lte_allow",
+            ),
+            CheckConstraint(
+                condition=Q(Entreprise_Num_Supervisor_Create__gte=0,
+                            Entreprise_Num_Supervisor_Create__lte=F("Entreprise_Num_Supervisor_Allow")),
+                name="chk_supervisor_create_lte_allow",
+            ),
+            CheckConstraint(
+                condition=Q(Entreprise_Num_Group_Create__gte=0,
+                            Entreprise_Num_Group_Create__lte=F("Entreprise_Num_Group_Allow")),
+                name="chk_group_create_lte_allow",
+            ),
+        ]
+
+    # Compteurs de places : écrits uniquement par SKT_account.quotas (UPDATE conditionnel)
+    SEAT_COUNTERS = (
+        "Entreprise_Num_Customer_Create",
+        "Entreprise_Num_User_Create",
+        "Entreprise_Num_Supervisor_Create",
+        "Entreprise_Num_Group_Create",
+    )
+
+    def save(self, *args, **kwargs):
+        # Modification d'une entreprise existante (admin, formulaire) : les compteurs lus avant
+        # l'enregistrement ne sont pas réécrits, une réservation concurrente n'est donc pas perdue
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.SEAT_COUNTERS
+            ]
+        super().save(*args, **kwargs)
+
     def clean(self):
-        #Validation inter-champs : s'assure que Entreprise_Num_Customer_Create ≤ Entreprise_Num_Customer_Allow
-        super().clean()
-        max_allowed = self.Entreprise_Num_Customer_Allow
-        # Si le plafond est absent, on bloque (
-        if max_allowed is None:
-            raise ValidationError({
-                "Entreprise_Num_Customer_Allow": _("Le nombre de client autorisé doit être défini.")
-            })
-
-        # Vérifie la borne supérieure dynamique
-        if self.Entreprise_Num_Customer_Create is not None and self.Entreprise_Num_Customer_Create > max_allowed:
-            raise ValidationError({
-                "Entreprise_Num_Customer_Create": _("La valeur ne peut pas dépasser %(max)s.") % {"max": max_allowed}
-            })
-
-        #Validation inter-champs : s'assure que Entreprise_Num_User_Create ≤ Entreprise_Num_User_Allow
+        # Validation inter-champs : chaque plafond est défini et couvre les places déjà réservées.
+        # Les compteurs ne sont pas modifiables ici (voir SKT_account.quotas) ; la contrainte
+        # en base reste la garantie en cas de réservation concurrente.
         super().clean()
-        max_allowed = self.Entreprise_Num_User_Allow
-        # Si le plafond est absent, on bloque (
-        if max_allowed is None:
-            raise ValidationError({
-                "Entreprise_Num_User_Allow": _("Le nombre d'utilisateur autorisé doit être défini.")
-            })
-
-        # Vérifie la borne supérieure dynamique
-        if self.Entreprise_Num_User_Create is not None and self.Entreprise_Num_User_Create > max_allowed:
-            raise ValidationError({
-                "Entreprise_Num_User_Create": _("La valeur ne peut pas dépasser %(max)s.") % {"max": max_allowed}
-            })      
-
-        #Validation inter-champs : s'assure que Entreprise_Num_Supervisor_Create ≤ Entreprise_Num_Supervisor_Allow
-        super().clean()
-        max_allowed = self.Entreprise_Num_Supervisor_Allow
-        # Si le plafond est absent, on bloque (
-        if max_allowed is None:
-            raise ValidationError({
-                "Entreprise_Num_Superviseur_Allow": _("Le nombre de superviseur autorisé doit être défini.")
-            })
-
-        # Vérifie la borne supérieure dynamique
-        if self.Entreprise_Num_Supervisor_Create is not None and self.Entreprise_Num_Supervisor_Create > max_allowed:
-            raise ValidationError({
-                "Entreprise_Num_Supervisor_Create": _("La valeur ne peut pas dépasser %(max)s.") % {"max": max_allowed}
-            })  
-
-        #Validation inter-champs : s'assure que Entreprise_Num_Group_Create ≤ Entreprise_Num_Group_Allow
-        super().clean()
-        max_allowed = self.Entreprise_Num_Group_Allow
-        # Si le plafond est absent, on bloque (
-        if max_allowed is None:
-            raise ValidationError({
-                "Entreprise_Num_Group_Allow": _("Le nombre de groupe autorisé doit être défini.")
-            })
+        couples = [
+            ("Entreprise_Num_Customer_Allow", "Entreprise_Num_Customer_Create",
+             _("Le nombre de client autorisé doit être défini.")),
+            ("Entreprise_Num_User_Allow", "Entreprise_Num_User_Create",
+             _("Le nombre d'utilisateur autorisé doit être défini.")),
+            ("Entreprise_Num_Supervisor_Allow", "Entreprise_Num_Supervisor_Create",
+             _("Le nombre de superviseur autorisé doit être défini.")),
+            ("Entreprise_Num_Group_Allow", "Entreprise_Num_Group_Create",
+             _("Le nombre de groupe autorisé doit être défini.")),
+        ]
+        errors = {}
+        for allow_field, created_field, missing in couples:
+            max_allowed = getattr(self, allow_field)
+            created = getattr(self, created_field)
+            if max_allowed is None:
+                errors[allow_field] = missing
+            elif created is not None and created > max_allowed:
+                errors[allow_field] = _("La valeur ne peut pas être inférieure aux %(n)s places déjà réservées.") % {"n": created}
+        if errors:
+            raise ValidationError(errors)
 
-        # Vérifie la borne supérieure dynamique
-        if self.Entreprise_Num_Group_Create is not None and self.Entreprise_Num_Group_Create > max_allowed:
-            raise ValidationError({
-                "Entreprise_Num_Group_Create": _("La valeur ne peut pas dépasser %(max)s.") % {"max": max_allowed}
-            }) 
-        
 
 
 ##############################
@@ -277,6 +348,30 @@ class Compte(User) :
     #Image de profil
     Compte_Image = models.ImageField(upload_to='SKM_Pictures/Profile', default='SKM_Pictures/Profile/default.png')
 
+
+###################################################
+# Synthèse d'utilisation par Entreprise et rôle   #
+###################################################
+class EntrepriseUsage(models.Model) :
+    # Tenue à jour par différences (voir SKT_account.usage), recalculable par la commande rebuild_usage
+
+    #Entreprise concernée
+    Usage_IDEntreprise = models.ForeignKey(Entreprise, on_delete = models.CASCADE, related_name = "usage")
+
+    #Rôle des comptes (User.role, vide si aucun groupe)
+    Usage_Role = models.CharField(max_length = 150, blank = True)
+
+    #Nombre de comptes actifs
+    Usage_Active = models.IntegerField(default = 0)
+
+    #Nombre de comptes (actifs ou non)
+    Usage_Total = models.IntegerField(default = 0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["Usage_IDEntreprise", "Usage_Role"], name="uniq_usage_entreprise_role"),
+        ]
+
 #####################################
 # Création des éléments par défault #
 #####################################
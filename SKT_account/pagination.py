@@ -0,0 +1,202 @@
+"""
+Listes paginées des pages de gestion (users_manage.html, entreprises_manage.html).
+
+Pagination par clé (keyset) sur la clé primaire : ``WHERE pk > curseur ORDER BY pk LIMIT n``
+reste en temps constant quelle que soit la page, contrairement à OFFSET.
+Seules les colonnes affichées par les templates sont chargées, et le nombre total
+de lignes est mis en cache (invalidé par les signaux, voir signals.py).
+
+Chaque liste a aussi une version (horodatage en nanosecondes) changée à chaque
+modification des lignes affichées : elle sert d'ETag / Last-Modified aux vues et
+de clé aux fragments de template en cache.
+
+Totaux, versions et fragments ne sont mis en cache qu'avec un cache partagé (SKT_CACHE_URL) :
+avec un cache local à chaque processus, une invalidation ne serait vue que du worker
+qui l'a faite et les autres serviraient des données périmées.
+"""
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.db import connections
+
+from .models import Entreprise
+from .sessions import shared_cache
+
+
+# items : lignes de la page ; next_cursor : clé à passer dans ?after= (None = dernière page)
+Page = namedtuple("Page", ["items", "next_cursor", "count"])
+
+COUNT_KEY = "skt:count:{}"
+VERSION_KEY = "skt:version:{}"
+
+
+def _shared():
+    # ``cache`` est un proxy : le test porte sur le backend réel
+    return shared_cache(caches[DEFAULT_CACHE_ALIAS])
+
+
+def _page_size():
+    return getattr(settings, "SKT_LISTING_PAGE_SIZE", 50)
+
+
+def _count_timeout():
+    return getattr(settings, "SKT_LISTING_COUNT_TIMEOUT", 60)
+
+
+def parse_cursor(value):
+    """Curseur reçu en paramètre GET (?after=) : entier ou None."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _keyset(queryset, key, after):
+    queryset = queryset.order_by(key)
+    if after is not None:
+        queryset = queryset.filter(**{f"{key}__gt": after})
+    # Une ligne de plus que la taille de page pour savoir s'il existe une page suivante
+    return queryset[:_page_size() + 1]
+
+
+def _split(rows, key):
+    size = _page_size()
+    if len(rows) > size:
+        rows = rows[:size]
+        return rows, getattr(rows[-1], key)
+    return rows, None
+
+
+def keyset_page(queryset, key, after=None, count_name=None):
+    rows, next_cursor = _split(list(_keyset(queryset, key, after)), key)
+    return Page(rows, next_cursor, cached_count(queryset, count_name))
+
+
+async def akeyset_page(queryset, key, after=None, count_name=None):
+    rows, next_cursor = _split([row async for row in _keyset(queryset, key, after)], key)
+    return Page(rows, next_cursor, await acached_count(queryset, count_name))
+
+
+def cached_count(queryset, name):
+    """COUNT(*) mis en cache sous ``name`` (recalculé à expiration ou après invalidation)."""
+    if not _shared():
+        return queryset.count()
+    key = COUNT_KEY.format(name)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, _count_timeout())
+    return count
+
+
+async def acached_count(queryset, name):
+    if not _shared():
+        return await queryset.acount()
+    key = COUNT_KEY.format(name)
+    count = await cache.aget(key)
+    if count is None:
+        count = await queryset.acount()
+        await cache.aset(key, count, _count_timeout())
+    return count
+
+
+def invalidate_count(name):
+    cache.delete(COUNT_KEY.format(name))
+
+
+def page_cache_timeout():
+    """
+    Durée de vie des versions et des fragments en cache : borne l'effet d'une écriture sans signal.
+    0 (fragments non mis en cache) sans cache partagé.
+    """
+    if not _shared():
+        return 0
+    return getattr(settings, "SKT_PAGE_CACHE_TIMEOUT", 3600)
+
+
+def page_version(name):
+    """Version courante de la liste ``name`` (créée si absente) ; None sans cache partagé."""
+    if not _shared():
+        return None
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), page_cache_timeout())
+        version = cache.get(key)
+    return version
+
+
+async def apage_version(name):
+    if not _shared():
+        return None
+    key = VERSION_KEY.format(name)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), page_cache_timeout())
+        version = await cache.aget(key)
+    return version
+
+
+def bump_page_version(name):
+    """Nouvelle version de la liste ``name`` : ETag et fragments précédents deviennent obsolètes."""
+    if not _shared():
+        return
+    cache.set(VERSION_KEY.format(name), time.time_ns(), page_cache_timeout())
+
+
+def estimated_count(queryset, exact_below):
+    """
+    Nombre de lignes d'une requête sans filtre, estimé par les statistiques PostgreSQL
+    (pg_class.reltuples, tenu à jour par ANALYZE/autovacuum) au lieu d'un COUNT(*).
+    COUNT(*) exact si la requête est filtrée, hors PostgreSQL ou sous ``exact_below`` lignes.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql" or queryset.query.where:
+        return queryset.count()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [connection.ops.quote_name(queryset.model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # reltuples vaut -1 tant que la table n'a jamais été analysée
+    estimate = row[0] if row else -1
+    if estimate < exact_below:
+        return queryset.count()
+    return estimate
+
+
+##########################################
+# Listes des pages de gestion            #
+##########################################
+def admin_users_queryset():
+    # Colonnes affichées par users_manage.html
+    return (
+        get_user_model().objects
+        .filter(groups__name="Administrator")
+        .only("email", "first_name", "last_name", "date_joined", "last_login")
+    )
+
+
+def entreprises_queryset():
+    # Colonnes affichées par entreprises_manage.html
+    return Entreprise.objects.only("Entreprise_Name", "Entreprise_Licence_Date_Start")
+
+
+def admin_users_page(after=None):
+    return keyset_page(admin_users_queryset(), "id", after, "admin_users")
+
+
+def entreprises_page(after=None):
+    return keyset_page(entreprises_queryset(), "IDEntreprise", after, "entreprises")
+
+
+async def aadmin_users_page(after=None):
+    return await akeyset_page(admin_users_queryset(), "id", after, "admin_users")
+
+
+async def aentreprises_page(after=None):
+    return await akeyset_page(entreprises_queryset(), "IDEntreprise", after, "entreprises")
@@ -0,0 +1,107 @@
+"""
+Cache des permissions des utilisateurs, partagé entre les requêtes.
+
+ModelBackend ne garde les permissions que sur l'instance de l'utilisateur : chaque
+requête refait les jointures auth_user_groups / auth_group_permissions / auth_permission.
+Ici, les ensembles de permissions (directes et par les groupes) sont stockés dans le
+cache sous une clé versionnée :
+
+    skt:perms:<id>:<user|group>:<version globale>:<version de l'utilisateur>
+
+- la version de l'utilisateur change avec ses groupes, ses permissions directes ou son
+  statut (is_active, is_superuser) ;
+- la version globale change avec les permissions d'un groupe, la suppression d'un groupe
+  ou d'une permission.
+
+Changer de version rend les anciennes entrées inaccessibles (elles expirent d'elles-mêmes).
+Les versions sont mises à jour par signals.py.
+
+Sans cache partagé (cache mémoire local), un changement de version ne serait vu que du
+worker qui l'a fait : les permissions sont alors calculées à chaque requête, comme ModelBackend.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .sessions import shared_cache
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_VERSION_KEY = "skt:perms:version"
+USER_VERSION_KEY = "skt:perms:user:{}"
+PERMS_KEY = "skt:perms:{}:{}:{}:{}"
+
+
+def _cache():
+    return caches[getattr(settings, "SKT_PERMISSION_CACHE", "default")]
+
+
+def _timeout():
+    return getattr(settings, "SKT_PERMISSION_CACHE_TIMEOUT", 3600)
+
+
+def _new_version():
+    # Jamais réutilisée, même si la clé de version a été évincée du cache
+    return str(time.time_ns())
+
+
+def _versions(user_id):
+    """(version globale, version de l'utilisateur), créées si absentes (une lecture groupée)."""
+    user_key = USER_VERSION_KEY.format(user_id)
+    found = _cache().get_many([GLOBAL_VERSION_KEY, user_key])
+    versions = []
+    for key in (GLOBAL_VERSION_KEY, user_key):
+        version = found.get(key)
+        if version is None:
+            _cache().add(key, _new_version(), None)
+            version = _cache().get(key)
+        versions.append(version)
+    return versions
+
+
+def _key(user_obj, from_name):
+    # Versions lues une fois par instance (permissions directes et par les groupes)
+    if not hasattr(user_obj, "_skt_perm_versions"):
+        user_obj._skt_perm_versions = _versions(user_obj.pk)
+    return PERMS_KEY.format(user_obj.pk, from_name, *user_obj._skt_perm_versions)
+
+
+def cached_permissions(user_obj, from_name, compute):
+    """
+    Permissions ``from_name`` ("user" ou "group") de ``user_obj`` : cache, sinon ``compute()``
+    (calcul de ModelBackend, mis en cache ensuite). Le cache indisponible n'empêche pas le calcul.
+    """
+    if not shared_cache(_cache()):
+        return compute()
+    try:
+        key = _key(user_obj, from_name)
+        perms = _cache().get(key)
+    except Exception:
+        logger.exception("Error reading permission cache")
+        return compute()
+    if perms is None:
+        perms = compute()
+        try:
+            _cache().set(key, perms, _timeout())
+        except Exception:
+            logger.exception("Error saving to permission cache")
+    return perms
+
+
+def bump_users(user_ids):
+    """Invalide les permissions en cache des utilisateurs ``user_ids``."""
+    version = _new_version()
+    try:
+        _cache().set_many({USER_VERSION_KEY.format(pk): version for pk in user_ids}, None)
+    except Exception:
+        logger.exception("Error saving to permission cache")
+
+
+def bump_all():
+    """Invalide les permissions en cache de tous les utilisateurs."""
+    try:
+        _cache().set(GLOBAL_VERSION_KEY, _new_version(), None)
+    except Exception:
+        logger.exception("Error saving to permission cache")
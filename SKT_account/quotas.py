@@ -0,0 +1,146 @@
+"""
+Réservation atomique des places (quotas) d'une Entreprise.
+
+Chaque appel exécute un seul ``UPDATE ... SET x = x + n WHERE x + n <= allow`` :
+pas de lecture préalable, pas de verrou applicatif. Si aucune ligne n'est mise
+à jour, le quota est atteint (ou l'entreprise n'existe pas). Les CheckConstraint
+de Entreprise garantissent la même règle au niveau de la base.
+
+Les compteurs suivent les comptes : toute création, suppression, changement de rôle ou
+d'entreprise d'un Compte réserve ou libère les places correspondantes (apply_deltas, appelée
+par signals.py et bulk.py avec les différences de la synthèse d'utilisation). Les compteurs
+*_Create ne sont écrits que par ce module (voir Entreprise.save) ; sync_seats les recale
+sur les comptes existants (commande rebuild_usage).
+"""
+from collections import Counter, defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils.translation import gettext_lazy as _
+
+from .models import Entreprise, EntrepriseUsage
+
+
+# Type de place -> (compteur créé, plafond autorisé)
+SEAT_FIELDS = {
+    "customer": ("Entreprise_Num_Customer_Create", "Entreprise_Num_Customer_Allow"),
+    "user": ("Entreprise_Num_User_Create", "Entreprise_Num_User_Allow"),
+    "supervisor": ("Entreprise_Num_Supervisor_Create", "Entreprise_Num_Supervisor_Allow"),
+    "group": ("Entreprise_Num_Group_Create", "Entreprise_Num_Group_Allow"),
+}
+
+# Groupe d'utilisateurs -> type de place consommée (les Administrator n'en consomment pas)
+ROLE_SEATS = {
+    "Customer": "customer",
+    "SKT_User": "user",
+    "Supervisor": "supervisor",
+}
+
+
+class QuotaExceeded(ValidationError):
+    """Le nombre de places demandé dépasse le quota autorisé de l'entreprise."""
+
+
+def _check_kinds(seats):
+    for kind, n in seats.items():
+        if kind not in SEAT_FIELDS:
+            raise ValueError(f"Type de place inconnu : {kind}")
+        if n < 0:
+            raise ValueError("Le nombre de places doit être positif.")
+
+
+def reserve_seats(entreprise_id, seats):
+    """
+    Réserve en une requête plusieurs types de places : ``seats`` = {"customer": 2, "user": 10}.
+    Tout ou rien : lève QuotaExceeded si un des plafonds serait dépassé.
+    """
+    seats = {kind: n for kind, n in seats.items() if n}
+    _check_kinds(seats)
+    if not seats:
+        return
+
+    conditions = {}
+    updates = {}
+    for kind, n in seats.items():
+        created, allow = SEAT_FIELDS[kind]
+        conditions[f"{created}__lte"] = F(allow) - n
+        updates[created] = F(created) + n
+
+    if not Entreprise.objects.filter(pk=entreprise_id, **conditions).update(**updates):
+        raise QuotaExceeded(
+            _("Quota de l'entreprise %(entreprise)s atteint."),
+            code="quota_exceeded", params={"entreprise": entreprise_id},
+        )
+
+
+def release_seats(entreprise_id, seats):
+    """Libère des places précédemment réservées (chaque compteur s'arrête à zéro)."""
+    seats = {kind: n for kind, n in seats.items() if n}
+    _check_kinds(seats)
+    if not seats:
+        return 0
+
+    updates = {}
+    for kind, n in seats.items():
+        created, _allow = SEAT_FIELDS[kind]
+        updates[created] = Greatest(F(created) - n, Value(0))
+
+    return Entreprise.objects.filter(pk=entreprise_id).update(**updates)
+
+
+def reserve_seat(entreprise_id, kind, n=1):
+    """Réserve ``n`` places d'un seul type."""
+    reserve_seats(entreprise_id, {kind: n})
+
+
+def release_seat(entreprise_id, kind, n=1):
+    """Libère ``n`` places d'un seul type."""
+    return release_seats(entreprise_id, {kind: n})
+
+
+def seats_for_roles(roles):
+    """Convertit une liste de noms de groupe en places à réserver : ["Customer", "Customer"] -> {"customer": 2}."""
+    return dict(Counter(ROLE_SEATS[role] for role in roles if role in ROLE_SEATS))
+
+
+def apply_deltas(changes):
+    """
+    Réserve ou libère les places correspondant aux différences de comptes ``changes``
+    ({(entreprise_id, rôle): (delta actifs, delta total)}, voir usage.deltas) : une requête
+    par entreprise, libérations avant réservations. Lève QuotaExceeded si un plafond serait
+    dépassé (à appeler dans la transaction qui modifie les comptes, annulée dans ce cas).
+    """
+    reserve = defaultdict(Counter)
+    release = defaultdict(Counter)
+    for (entreprise_id, role), (_d_active, d_total) in changes.items():
+        kind = ROLE_SEATS.get(role)
+        if kind is None or entreprise_id is None or not d_total:
+            continue
+        if d_total > 0:
+            reserve[entreprise_id][kind] += d_total
+        else:
+            release[entreprise_id][kind] -= d_total
+    for entreprise_id in sorted(release):
+        release_seats(entreprise_id, release[entreprise_id])
+    for entreprise_id in sorted(reserve):
+        reserve_seats(entreprise_id, reserve[entreprise_id])
+
+
+def sync_seats(entreprise_ids=None):
+    """
+    Recale les compteurs de places sur la synthèse d'utilisation (comptes existants par rôle),
+    sans dépasser les plafonds. Retourne le nombre d'entreprises mises à jour.
+    """
+    entreprises = Entreprise.objects.all()
+    if entreprise_ids is not None:
+        entreprises = entreprises.filter(pk__in=list(entreprise_ids))
+    updates = {}
+    for role, kind in ROLE_SEATS.items():
+        created, allow = SEAT_FIELDS[kind]
+        total = EntrepriseUsage.objects.filter(
+            Usage_IDEntreprise=OuterRef("pk"), Usage_Role=role
+        ).values("Usage_Total")[:1]
+        updates[created] = Least(Coalesce(Subquery(total), Value(0)), F(allow))
+    return entreprises.update(**updates)
+
@@ -0,0 +1,165 @@
+"""
+Limitation du débit des tentatives de connexion, par adresse IP et par email.
+
+Fenêtre glissante approchée par deux compteurs fixes (fenêtre courante et précédente) :
+estimation = précédente × part restante de la fenêtre + courante. Les compteurs sont
+stockés dans le cache ``SKT_RATELIMIT_CACHE`` : cache mémoire local pour un seul
+nœud, cache partagé (Redis, Memcached) pour plusieurs.
+Les tentatives au-delà de la limite sont rejetées (429) avant tout hachage de mot de passe.
+
+Par email, toutes les tentatives sont comptées. Par adresse IP, seuls les échecs le sont
+(signal user_login_failed, voir signals.py) : les connexions réussies des utilisateurs
+d'une même entreprise derrière un NAT ne consomment pas la limite.
+"""
+import hashlib
+import math
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.translation import gettext_lazy as _
+
+
+def _cache():
+    return caches[getattr(settings, "SKT_RATELIMIT_CACHE", "default")]
+
+
+def _keys(scope, value, window, now):
+    digest = hashlib.sha256(value.encode()).hexdigest()[:32]
+    bucket = int(now // window)
+    return f"skt:rl:{scope}:{digest}:{bucket}", f"skt:rl:{scope}:{digest}:{bucket - 1}"
+
+
+def _estimate(current, previous, window, now):
+    elapsed = (now % window) / window
+    return previous * (1 - elapsed) + current
+
+
+def _retry_after(window, now):
+    return max(1, math.ceil(window - now % window))
+
+
+def _count_key(current_key, window):
+    # Ajout d'une tentative à la fenêtre courante
+    cache = _cache()
+    cache.add(current_key, 0, window * 2)
+    try:
+        return cache.incr(current_key)
+    except ValueError:
+        # Clé expirée entre add() et incr()
+        cache.set(current_key, 1, window * 2)
+        return 1
+
+
+def hit(scope, value, limit, window, now=None):
+    """
+    Enregistre une tentative pour ``value`` et indique si elle dépasse ``limit`` sur ``window`` secondes.
+    Retourne le nombre de secondes à attendre, ou 0 si la tentative est autorisée.
+    """
+    now = time.time() if now is None else now
+    current_key, previous_key = _keys(scope, value, window, now)
+    current = _count_key(current_key, window)
+    previous = _cache().get(previous_key, 0)
+    return _retry_after(window, now) if _estimate(current, previous, window, now) > limit else 0
+
+
+def record(scope, value, window, now=None):
+    """Enregistre une tentative pour ``value`` sans vérifier de limite (voir blocked())."""
+    now = time.time() if now is None else now
+    _count_key(_keys(scope, value, window, now)[0], window)
+
+
+def blocked(scope, value, limit, window, now=None):
+    """
+    Indique, sans l'enregistrer, si une nouvelle tentative pour ``value`` dépasserait ``limit``.
+    Retourne le nombre de secondes à attendre, ou 0.
+    """
+    now = time.time() if now is None else now
+    current_key, previous_key = _keys(scope, value, window, now)
+    found = _cache().get_many([current_key, previous_key])
+    estimate = _estimate(found.get(current_key, 0) + 1, found.get(previous_key, 0), window, now)
+    return _retry_after(window, now) if estimate > limit else 0
+
+
+async def ahit(scope, value, limit, window, now=None):
+    """Version asynchrone de hit()."""
+    now = time.time() if now is None else now
+    cache = _cache()
+    current_key, previous_key = _keys(scope, value, window, now)
+    await cache.aadd(current_key, 0, window * 2)
+    try:
+        current = await cache.aincr(current_key)
+    except ValueError:
+        await cache.aset(current_key, 1, window * 2)
+        current = 1
+    previous = await cache.aget(previous_key, 0)
+    return _retry_after(window, now) if _estimate(current, previous, window, now) > limit else 0
+
+
+async def ablocked(scope, value, limit, window, now=None):
+    """Version asynchrone de blocked()."""
+    now = time.time() if now is None else now
+    current_key, previous_key = _keys(scope, value, window, now)
+    found = await _cache().aget_many([current_key, previous_key])
+    estimate = _estimate(found.get(current_key, 0) + 1, found.get(previous_key, 0), window, now)
+    return _retry_after(window, now) if estimate > limit else 0
+
+
+def client_ip(request):
+    """
+    Adresse IP du client. Avec SKT_RATELIMIT_TRUST_FORWARDED, adresse de X-Forwarded-For
+    ajoutée par le proxy de confiance : la SKT_RATELIMIT_PROXY_HOPS-ième en partant de la
+    droite (les adresses plus à gauche sont fournies par le client et ne sont pas fiables).
+    """
+    if getattr(settings, "SKT_RATELIMIT_TRUST_FORWARDED", False):
+        forwarded = [ip.strip() for ip in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if ip.strip()]
+        hops = getattr(settings, "SKT_RATELIMIT_PROXY_HOPS", 1)
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _email(request):
+    return (request.POST.get("username") or "").strip().lower()
+
+
+def login_failed(request):
+    """Échec de connexion depuis ``request`` : compté dans la limite par adresse IP."""
+    if request is None or not getattr(settings, "SKT_RATELIMIT_ENABLED", True):
+        return
+    _limit, window = settings.SKT_RATELIMIT_LOGIN_IP
+    record("ip", client_ip(request), window)
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(_("Trop de tentatives de connexion, veuillez réessayer plus tard."), status=429)
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+def login_ratelimit(view_func):
+    """Décorateur des vues de connexion (synchrones ou asynchrones) : 429 au-delà des limites."""
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _wrapped(request, *args, **kwargs):
+            if getattr(settings, "SKT_RATELIMIT_ENABLED", True):
+                wait = await ablocked("ip", client_ip(request), *settings.SKT_RATELIMIT_LOGIN_IP)
+                if not wait and _email(request):
+                    wait = await ahit("email", _email(request), *settings.SKT_RATELIMIT_LOGIN_EMAIL)
+                if wait:
+                    return too_many_requests(wait)
+            return await view_func(request, *args, **kwargs)
+    else:
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if getattr(settings, "SKT_RATELIMIT_ENABLED", True):
+                wait = blocked("ip", client_ip(request), *settings.SKT_RATELIMIT_LOGIN_IP)
+                if not wait and _email(request):
+                    wait = hit("email", _email(request), *settings.SKT_RATELIMIT_LOGIN_EMAIL)
+                if wait:
+                    return too_many_requests(wait)
+            return view_func(request, *args, **kwargs)
+    return _wrapped
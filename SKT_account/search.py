@@ -0,0 +1,87 @@
+"""
+Recherche de comptes (admin, endpoint JSON du staff).
+
+- PostgreSQL : chaque mot doit apparaître dans User.search_text (email, prénom, nom en
+  minuscules) ; les ``LIKE '%mot%'`` sont servis par l'index GIN à trigrammes, les résultats
+  sont classés par similarité (pg_trgm word_similarity).
+- Autres bases (SQLite) : chaque mot doit être le début de l'email, du prénom ou du nom ;
+  comparaisons par intervalle sur LOWER(champ), servies par les index de la migration 0005.
+  Classement : correspondance sur l'email d'abord.
+
+Les deux variantes annotent ``search_rank`` (plus grand = plus pertinent).
+"""
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Lower
+
+from .models import Compte
+
+PREFIX_FIELDS = ("email", "first_name", "last_name")
+
+
+def _min_length():
+    return getattr(settings, "SKT_SEARCH_MIN_LENGTH", 3)
+
+
+def terms(query):
+    """Mots de la recherche, en minuscules ; vide si la recherche est trop courte pour être indexée."""
+    words = query.lower().split()
+    if not words or len(" ".join(words)) < _min_length():
+        return []
+    return words
+
+
+def _prefix_q(field, word):
+    # Intervalle [mot, mot + U+10FFFF[ : équivalent de LIKE 'mot%' utilisant l'index sur LOWER(champ)
+    return Q(**{f"{field}_lower__gte": word, f"{field}_lower__lt": word + "\U0010ffff"})
+
+
+def search_comptes(query, queryset=None):
+    """Comptes correspondant à ``query``, annotés de ``search_rank`` et triés par pertinence."""
+    queryset = Compte.objects.all() if queryset is None else queryset
+    words = terms(query)
+    if not words:
+        return queryset.annotate(search_rank=Value(0, output_field=IntegerField())).none()
+
+    if connections[queryset.db].vendor == "postgresql":
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        for word in words:
+            queryset = queryset.filter(search_text__contains=word)
+        queryset = queryset.annotate(search_rank=TrigramWordSimilarity(" ".join(words), "search_text"))
+    else:
+        queryset = queryset.annotate(**{f"{field}_lower": Lower(field) for field in PREFIX_FIELDS})
+        for word in words:
+            condition = Q()
+            for field in PREFIX_FIELDS:
+                condition |= _prefix_q(field, word)
+            queryset = queryset.filter(condition)
+        queryset = queryset.annotate(search_rank=Case(
+            When(_prefix_q("email", words[0]), then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        ))
+    return queryset.order_by("-search_rank", "pk")
+
+
+def search_results(query, limit):
+    """Résultats de l'endpoint JSON : liste de dictionnaires (au plus ``limit``)."""
+    rows = search_comptes(query).values(
+        "pk", "email", "first_name", "last_name", "role", "is_active",
+        "Compte_IDEntreprise_id", "Compte_IDEntreprise__Entreprise_Name", "search_rank",
+    )[:limit]
+    return [
+        {
+            "id": row["pk"],
+            "email": row["email"],
+            "first_name": row["first_name"],
+            "last_name": row["last_name"],
+            "role": row["role"],
+            "is_active": row["is_active"],
+            "entreprise_id": row["Compte_IDEntreprise_id"],
+            "entreprise": row["Compte_IDEntreprise__Entreprise_Name"],
+            "rank": row["search_rank"],
+        }
+        for row in rows
+    ]
@@ -0,0 +1,177 @@
+"""
+Moteur de session à cache prioritaire (SESSION_ENGINE = "SKT_account.sessions").
+
+Extension de django.contrib.sessions.backends.cached_db :
+- les sessions sont lues dans le cache, la base n'est lue qu'en cas d'absence ;
+- l'écriture en base est différée quand seule l'expiration change : une session dont le
+  contenu est identique n'est réécrite en base qu'après SKT_SESSION_DB_REFRESH secondes
+  (les rafraîchissements d'expiration sont ainsi regroupés) ;
+- toute modification du contenu (connexion, déconnexion, messages) est écrite immédiatement
+  en base, qui reste la référence : si le cache est vidé ou indisponible, rien n'est perdu.
+
+Le même module met en cache l'utilisateur authentifié (voir LoginBackend.get_user),
+invalidé à chaque modification de l'utilisateur (voir signals.py).
+
+Ces caches entre requêtes supposent un cache partagé par tous les workers (SKT_CACHE_URL) :
+une invalidation faite dans un cache mémoire local ne vaut que pour son processus. Sans cache
+partagé, settings.py garde le moteur de session en base et l'utilisateur n'est pas mis en cache.
+"""
+import hashlib
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger("django.contrib.sessions")
+
+SYNC_PREFIX = "skt.sessions.sync"
+USER_KEY = "skt:user:{}"
+
+
+def shared_cache(cache):
+    """Indique si ``cache`` est partagé entre les processus (invalidations visibles de tous les workers)."""
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+def _digest(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class SessionStore(cached_db.SessionStore):
+
+    def _sync_key(self):
+        return SYNC_PREFIX + self._get_or_create_session_key()
+
+    def _refresh(self):
+        return getattr(settings, "SKT_SESSION_DB_REFRESH", 300)
+
+    def load(self):
+        try:
+            data = self._cache.get(self.cache_key)
+        except Exception:
+            data = None
+
+        if data is None:
+            # Absente du cache : lecture en base (référence), puis remise en cache
+            s = self._get_session_from_db()
+            if not s:
+                return {}
+            data = self.decode(s.session_data)
+            try:
+                self._cache.set(self.cache_key, data, self.get_expiry_age(expiry=s.expire_date))
+                self._cache.set(self._sync_key(), (_digest(data), time.time()), self.get_expiry_age(expiry=s.expire_date))
+            except Exception:
+                logger.exception("Error saving to cache (%s)", self._cache)
+        return data
+
+    def _db_write_needed(self, digest):
+        try:
+            synced = self._cache.get(self._sync_key())
+        except Exception:
+            return True
+        if synced is None:
+            return True
+        synced_digest, synced_at = synced
+        return synced_digest != digest or time.time() - synced_at >= self._refresh()
+
+    def save(self, must_create=False):
+        data = self._get_session(no_load=must_create)
+        digest = _digest(data)
+
+        if must_create or self.session_key is None or self._db_write_needed(digest):
+            super().save(must_create)
+            try:
+                self._cache.set(self._sync_key(), (digest, time.time()), self.get_expiry_age())
+            except Exception:
+                logger.exception("Error saving to cache (%s)", self._cache)
+            return
+
+        # Contenu inchangé et base récente : seule l'entrée du cache est prolongée
+        try:
+            self._cache.set(self.cache_key, data, self.get_expiry_age())
+        except Exception:
+            logger.exception("Error saving to cache (%s)", self._cache)
+            super().save(must_create)
+
+    async def asave(self, must_create=False):
+        # Les sessions sont écrites par SessionMiddleware (synchrone) : repli sur le comportement de cached_db
+        await super().asave(must_create)
+        try:
+            await self._cache.aset(
+                SYNC_PREFIX + await self._aget_or_create_session_key(),
+                (_digest(self._session), time.time()),
+                await self.aget_expiry_age(),
+            )
+        except Exception:
+            logger.exception("Error saving to cache (%s)", self._cache)
+
+    def delete(self, session_key=None):
+        key = session_key or self.session_key
+        super().delete(session_key)
+        if key:
+            self._cache.delete(SYNC_PREFIX + key)
+
+
+##########################################
+# Utilisateur authentifié en cache       #
+##########################################
+def _user_cache():
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def _user_timeout():
+    return getattr(settings, "SKT_USER_CACHE_TIMEOUT", 300)
+
+
+def get_cached_user(user_id, loader):
+    """
+    Utilisateur ``user_id`` depuis le cache, sinon ``loader(user_id)`` (mis en cache s'il existe).
+    Sans cache partagé, toujours ``loader(user_id)``.
+    """
+    if not shared_cache(_user_cache()):
+        return loader(user_id)
+    key = USER_KEY.format(user_id)
+    try:
+        user = _user_cache().get(key)
+    except Exception:
+        return loader(user_id)
+    if user is None:
+        user = loader(user_id)
+        if user is not None:
+            try:
+                _user_cache().set(key, user, _user_timeout())
+            except Exception:
+                logger.exception("Error saving to cache (%s)", _user_cache())
+    return user
+
+
+async def aget_cached_user(user_id, loader):
+    """Version asynchrone de get_cached_user() (``loader`` est une coroutine)."""
+    if not shared_cache(_user_cache()):
+        return await loader(user_id)
+    key = USER_KEY.format(user_id)
+    try:
+        user = await _user_cache().aget(key)
+    except Exception:
+        return await loader(user_id)
+    if user is None:
+        user = await loader(user_id)
+        if user is not None:
+            try:
+                await _user_cache().aset(key, user, _user_timeout())
+            except Exception:
+                logger.exception("Error saving to cache (%s)", _user_cache())
+    return user
+
+
+def invalidate_cached_users(user_ids):
+    """Supprime les utilisateurs ``user_ids`` du cache (après toute modification)."""
+    try:
+        _user_cache().delete_many([USER_KEY.format(pk) for pk in user_ids])
+    except Exception:
+        logger.exception("Error deleting from cache (%s)", _user_cache())
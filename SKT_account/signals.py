@@ -0,0 +1,249 @@
+from django.db import transaction
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_login_failed
+from django.contrib.auth.models import Group, Permission
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Entreprise, Compte
+from . import images, permissions, quotas, ratelimit, usage
+from .pagination import bump_page_version, invalidate_count
+from .sessions import invalidate_cached_users
+
+
+################################################
+# Invalidation des totaux des pages de gestion #
+################################################
+@receiver(post_save, sender=Entreprise)
+@receiver(post_delete, sender=Entreprise)
+def entreprise_count_changed(sender, instance, created=True, **kwargs):
+    if created:
+        invalidate_count("entreprises")
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def user_groups_count_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_count("admin_users")
+
+
+@receiver(post_delete, sender=get_user_model())
+def user_count_changed(sender, **kwargs):
+    invalidate_count("admin_users")
+
+
+##############################################
+# Versions des pages de gestion              #
+##############################################
+@receiver(post_save, sender=Entreprise)
+@receiver(post_delete, sender=Entreprise)
+def entreprise_page_changed(sender, **kwargs):
+    bump_page_version("entreprises")
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+@receiver(post_save, sender=Compte)
+@receiver(post_delete, sender=Compte)
+def user_page_changed(sender, **kwargs):
+    bump_page_version("users")
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def user_groups_page_changed(sender, action, **kwargs):
+    # La liste des utilisateurs ne montre que le groupe "Administrator"
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_page_version("users")
+
+
+##############################################
+# Synchronisation du rôle dénormalisé        #
+##############################################
+def _track(before, after):
+    # Mêmes différences pour la synthèse d'utilisation et les places réservées de l'entreprise
+    # (QuotaExceeded annule la transaction en cours, voir CompteAdmin.changeform_view)
+    changes = usage.deltas(before.values(), after.values())
+    quotas.apply_deltas(changes)
+    usage.apply(changes)
+
+
+def primary_group_subquery():
+    """Nom du premier groupe (même ordre que groups.first()) de l'utilisateur OuterRef("pk")."""
+    return Subquery(
+        Group.objects.filter(user=OuterRef("pk")).order_by("pk").values("name")[:1]
+    )
+
+
+def refresh_roles(user_ids):
+    """Recalcule User.role pour ``user_ids`` en une seule requête UPDATE."""
+    user_ids = list(user_ids)
+    before = usage.snapshot(user_ids)
+    get_user_model().objects.filter(pk__in=user_ids).update(
+        role=Coalesce(primary_group_subquery(), Value(""))
+    )
+    _track(before, usage.snapshot(before))
+    invalidate_cached_users(user_ids)
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def user_groups_role_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear", "pre_clear"):
+        return
+
+    if not reverse:
+        # user.groups.add(...) : un seul utilisateur, l'instance est aussi mise à jour
+        if action == "pre_clear":
+            return
+        before = usage.snapshot([instance.pk])
+        instance.role = instance.groups.order_by("pk").values_list("name", flat=True).first() or ""
+        type(instance).objects.filter(pk=instance.pk).update(role=instance.role)
+        _track(before, usage.snapshot(before))
+        invalidate_cached_users([instance.pk])
+        return
+
+    # group.user_set.add(...) : pk_set contient les utilisateurs concernés
+    # (pour clear, ils sont mémorisés avant la suppression des liens)
+    if action == "pre_clear":
+        instance._skt_cleared_users = list(instance.user_set.values_list("pk", flat=True))
+        return
+    if action == "post_clear":
+        pk_set = getattr(instance, "_skt_cleared_users", [])
+    refresh_roles(pk_set)
+
+
+@receiver(post_save, sender=Group)
+def group_renamed_role_changed(sender, instance, created, **kwargs):
+    if not created:
+        refresh_roles(instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted_role_changed(sender, instance, **kwargs):
+    # Les liens utilisateur/groupe sont déjà supprimés : recalcul des utilisateurs qui l'avaient pour rôle
+    refresh_roles(get_user_model().objects.filter(role=instance.name).values_list("pk", flat=True))
+
+
+##############################################
+# Synthèse d'utilisation par entreprise      #
+##############################################
+USAGE_FIELDS = {"is_active", "role", "Compte_IDEntreprise"}
+
+
+@receiver(pre_save, sender=get_user_model())
+@receiver(pre_save, sender=Compte)
+def compte_usage_before(sender, instance, update_fields=None, **kwargs):
+    # État avant enregistrement (sauf si seuls des champs sans effet sur la synthèse sont écrits, ex. last_login)
+    if update_fields is not None and not USAGE_FIELDS.intersection(update_fields):
+        instance._skt_usage_before = None
+        return
+    instance._skt_usage_before = usage.snapshot([instance.pk]) if instance.pk else {}
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_save, sender=Compte)
+def compte_usage_after(sender, instance, **kwargs):
+    before = getattr(instance, "_skt_usage_before", None)
+    instance._skt_usage_before = None
+    if before is not None:
+        _track(before, usage.snapshot([instance.pk]))
+
+
+@receiver(pre_delete, sender=Compte)
+def compte_usage_before_delete(sender, instance, **kwargs):
+    # État lu en base : l'instance peut garder un rôle d'une transaction annulée
+    instance._skt_usage_before = usage.snapshot([instance.pk])
+
+
+@receiver(post_delete, sender=Compte)
+def compte_usage_deleted(sender, instance, **kwargs):
+    before = getattr(instance, "_skt_usage_before", None)
+    instance._skt_usage_before = None
+    if before is None:
+        before = {instance.pk: (instance.Compte_IDEntreprise_id, instance.role, instance.is_active)}
+    changes = usage.deltas(before.values(), [])
+    quotas.apply_deltas(changes)
+    usage.apply(changes)
+
+
+##############################################
+# Traitement des images de profil            #
+##############################################
+@receiver(post_save, sender=Compte)
+def compte_image_saved(sender, instance, **kwargs):
+    if not images.is_processed(instance.Compte_Image.name):
+        pk = instance.pk
+        transaction.on_commit(lambda: images.schedule(pk))
+
+
+##############################################
+# Invalidation des utilisateurs en cache     #
+##############################################
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+@receiver(post_save, sender=Compte)
+@receiver(post_delete, sender=Compte)
+def user_changed(sender, instance, **kwargs):
+    invalidate_cached_users([instance.pk])
+
+
+##############################################
+# Invalidation des permissions en cache      #
+##############################################
+def _bump_users(user_ids):
+    # Immédiatement, puis après le commit : une lecture concurrente pendant la transaction
+    # ne peut pas laisser en cache les anciennes permissions sous la nouvelle version
+    user_ids = list(user_ids)
+    permissions.bump_users(user_ids)
+    transaction.on_commit(lambda: permissions.bump_users(user_ids))
+
+
+def _bump_all():
+    permissions.bump_all()
+    transaction.on_commit(permissions.bump_all)
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+@receiver(m2m_changed, sender=get_user_model().user_permissions.through)
+def user_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        _bump_users([instance.pk])
+    elif action == "post_clear":
+        # group.user_set.clear() / permission.user_set.clear() : utilisateurs non connus ici
+        _bump_all()
+    else:
+        _bump_users(pk_set)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        _bump_all()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def permission_set_changed(sender, **kwargs):
+    _bump_all()
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_save, sender=Compte)
+def user_status_changed(sender, instance, created, update_fields=None, **kwargs):
+    # is_active et is_superuser changent le résultat des vérifications de permissions
+    if created or (update_fields is not None and not {"is_active", "is_superuser"}.intersection(update_fields)):
+        return
+    _bump_users([instance.pk])
+
+
+##############################################
+# Limitation des connexions                  #
+##############################################
+@receiver(user_login_failed)
+def login_failed(sender, credentials, request=None, **kwargs):
+    # Seuls les échecs comptent dans la limite par adresse IP
+    ratelimit.login_failed(request)
@@ -0,0 +1,189 @@
+"""
+Fichiers statiques nommés par empreinte et précompressés.
+
+- CompressedManifestStaticFilesStorage : à l'exécution de ``collectstatic``, les fichiers
+  reçoivent un nom haché (ManifestStaticFilesStorage) et des variantes .gz et .br
+  (Brotli si le paquet ``brotli`` est installé) sont écrites à côté.
+- PrecompressedStaticMiddleware : sert les fichiers de STATIC_ROOT en choisissant la variante
+  acceptée par le navigateur ; les fichiers hachés sont servis avec un Cache-Control
+  « immutable » d'un an, le navigateur ne les redemande donc plus. Les autres sont revalidés
+  (ETag / Last-Modified) : réponse 304 sans contenu s'ils n'ont pas changé.
+  Sous ASGI, seules les requêtes de fichiers statiques passent par un thread.
+"""
+import gzip
+import mimetypes
+import os
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # Brotli optionnel : seules les variantes gzip sont produites
+    brotli = None
+
+COMPRESSIBLE = (".css", ".js", ".mjs", ".svg", ".html", ".txt", ".json", ".xml", ".map", ".ico")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=0, must-revalidate"
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def stored_name(self, name):
+        # Un fichier absent (ex. css/style.css de create_user.html) garde son nom
+        # au lieu de provoquer une erreur 500
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed = []
+        for name, hashed_name, done in super().post_process(paths, dry_run, **options):
+            processed.append(hashed_name or name)
+            yield name, hashed_name, done
+        if dry_run:
+            return
+        for name in set(processed) | set(paths):
+            if isinstance(name, str) and name.endswith(COMPRESSIBLE) and self.exists(name):
+                self._compress(name)
+
+    def _compress(self, name):
+        path = self.path(name)
+        with open(path, "rb") as f:
+            data = f.read()
+        variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", brotli.compress(data, quality=11)))
+        for suffix, content in variants:
+            # Variante inutile si elle n'est pas plus petite que l'original
+            if len(content) < len(data):
+                with open(path + suffix, "wb") as f:
+                    f.write(content)
+
+
+def _hashed_names():
+    """Noms hachés connus du manifeste (servis avec un cache immuable)."""
+    if not hasattr(_hashed_names, "cache"):
+        manifest = getattr(staticfiles_storage, "hashed_files", None) or {}
+        _hashed_names.cache = set(manifest.values())
+    return _hashed_names.cache
+
+
+def _accepted_encodings(header):
+    """Poids (q) de chaque codage d'un en-tête Accept-Encoding ; q=0 signifie refusé."""
+    weights = {}
+    for part in header.split(","):
+        coding, *params = (p.strip() for p in part.split(";"))
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.lower()] = q
+    return weights
+
+
+def _async_file(response):
+    """FileResponse lue dans un thread : le serveur ASGI ne consomme que des itérateurs asynchrones."""
+    if response.streaming and not response.is_async:
+        iterator = response.streaming_content
+
+        async def chunks():
+            for chunk in await sync_to_async(list, thread_sensitive=False)(iterator):
+                yield chunk
+
+        response.streaming_content = chunks()
+    return response
+
+
+class PrecompressedStaticMiddleware:
+    """À placer juste après SecurityMiddleware ; sans effet si STATIC_ROOT n'est pas défini."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.root = str(settings.STATIC_ROOT) if settings.STATIC_ROOT else None
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith("/") else "/" + settings.STATIC_URL
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _static_name(self, request):
+        """Nom du fichier demandé sous STATIC_URL, ou None si la requête n'est pas pour nous."""
+        if self.root and request.method in ("GET", "HEAD") and request.path.startswith(self.prefix):
+            return request.path[len(self.prefix):]
+        return None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        name = self._static_name(request)
+        if name is not None:
+            response = self.serve(request, name)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        name = self._static_name(request)
+        if name is not None:
+            # Accès disque dans un thread, pour les seules requêtes de fichiers statiques
+            response = await sync_to_async(self.serve, thread_sensitive=False)(request, name)
+            if response is not None:
+                return _async_file(response)
+        return await self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        content_type, _ = mimetypes.guess_type(path)
+        weights = _accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        encoding = None
+        # Variante de poids le plus élevé (Brotli à égalité) ; « * » vaut pour les codages non cités
+        candidates = sorted(
+            ((weights.get(candidate, weights.get("*", 0.0)), suffix, candidate)
+             for suffix, candidate in ((".br", "br"), (".gz", "gzip"))),
+            key=lambda c: -c[0],
+        )
+        for q, suffix, candidate in candidates:
+            if q > 0 and os.path.isfile(path + suffix):
+                path, encoding = path + suffix, candidate
+                break
+
+        # Validateurs de la variante servie (chaque encodage a sa propre représentation)
+        stat = os.stat(path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        last_modified = int(stat.st_mtime)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            # Nom du fichier d'origine (et non de la variante .gz/.br) dans Content-Disposition
+            response = FileResponse(
+                open(path, "rb"),
+                content_type=content_type or "application/octet-stream",
+                filename=os.path.basename(name),
+            )
+            if encoding:
+                response["Content-Encoding"] = encoding
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        response["Vary"] = "Accept-Encoding"
+        response["Cache-Control"] = IMMUTABLE if name in _hashed_names() else REVALIDATE
+        return response
@@ -1,3 +1,628 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import json
+import os
+import tempfile
+import threading
+from datetime import date
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser, Group, Permission
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import AsyncClient, Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+
+from . import async_views, pagination, permissions, tokens, usage, views
+from .models import Compte, Entreprise, EntrepriseUsage, User
+from .quotas import QuotaExceeded, release_seats, reserve_seats
+from .search import search_comptes
+
+
+def make_compte(entreprise, email, *groups):
+    compte = Compte.objects.create(email=email, Compte_IDEntreprise=entreprise)
+    for name in groups:
+        compte.groups.add(Group.objects.get(name=name))
+    return compte
+
+
+def counters(entreprise):
+    entreprise.refresh_from_db()
+    return entreprise.Entreprise_Num_Customer_Create, entreprise.Entreprise_Num_User_Create
+
+
+def usage_rows(entreprise):
+    return {
+        usage.Usage_Role: (usage.Usage_Active, usage.Usage_Total)
+        for usage in EntrepriseUsage.objects.filter(Usage_IDEntreprise=entreprise)
+        if usage.Usage_Total
+    }
+
+
+##############################################
+# Réservation des places (quotas)            #
+##############################################
+class QuotaTests(TestCase):
+
+    def setUp(self):
+        self.entreprise = Entreprise.objects.create(
+            Entreprise_Name="Quotas", Entreprise_Num_Customer_Allow=2, Entreprise_Num_User_Allow=3,
+        )
+
+    def test_reserve_up_to_allow(self):
+        reserve_seats(self.entreprise.pk, {"customer": 2, "user": 3})
+        self.assertEqual(counters(self.entreprise), (2, 3))
+
+    def test_over_quota_reserves_nothing(self):
+        reserve_seats(self.entreprise.pk, {"user": 1})
+        with self.assertRaises(QuotaExceeded) as raised:
+            reserve_seats(self.entreprise.pk, {"customer": 1, "user": 3})
+        self.assertEqual(raised.exception.params["entreprise"], self.entreprise.pk)
+        self.assertEqual(counters(self.entreprise), (0, 1))
+
+    def test_reservation_ignores_stale_instance(self):
+        stale = Entreprise.objects.get(pk=self.entreprise.pk)
+        reserve_seats(self.entreprise.pk, {"customer": 2})
+        stale.Entreprise_Name = "Renommée"
+        stale.save()
+        self.assertEqual(counters(self.entreprise), (2, 0))
+        with self.assertRaises(QuotaExceeded):
+            reserve_seats(self.entreprise.pk, {"customer": 1})
+
+    def test_release_stops_at_zero(self):
+        reserve_seats(self.entreprise.pk, {"user": 1})
+        release_seats(self.entreprise.pk, {"customer": 1, "user": 2})
+        self.assertEqual(counters(self.entreprise), (0, 0))
+
+    def test_compte_lifecycle(self):
+        first = make_compte(self.entreprise, "c1@test.fr", "Customer")
+        make_compte(self.entreprise, "c2@test.fr", "Customer")
+        self.assertEqual(counters(self.entreprise), (2, 0))
+
+        with self.assertRaises(QuotaExceeded), transaction.atomic():
+            make_compte(self.entreprise, "c3@test.fr", "Customer")
+        self.assertFalse(Compte.objects.filter(email="c3@test.fr").exists())
+
+        first.groups.set([Group.objects.get(name="SKT_User")])
+        self.assertEqual(counters(self.entreprise), (1, 1))
+        first.delete()
+        self.assertEqual(counters(self.entreprise), (1, 0))
+
+
+@skipUnless(connection.vendor == "postgresql", "réservations concurrentes : PostgreSQL")
+class ConcurrentQuotaTests(TransactionTestCase):
+
+    def test_concurrent_reservations_never_exceed_allow(self):
+        entreprise = Entreprise.objects.create(Entreprise_Name="Concurrence", Entreprise_Num_User_Allow=5)
+        results = []
+
+        def reserve():
+            try:
+                reserve_seats(entreprise.pk, {"user": 1})
+                results.append(True)
+            except QuotaExceeded:
+                results.append(False)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=reserve) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count(True), 5)
+        entreprise.refresh_from_db()
+        self.assertEqual(entreprise.Entreprise_Num_User_Create, 5)
+
+
+##############################################
+# Tokens de passage                          #
+##############################################
+@override_settings(SKT_SECRET_KEY="secret-de-test", SKT_URL_TIMEOUT=300)
+class TokenTests(TestCase):
+
+    def token(self, id_user, issued, signature=None):
+        message = f"{id_user}|{issued}"
+        raw = f"{message}|{signature or tokens.sign(message)}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def test_valid_token(self):
+        self.assertEqual(tokens.verify_token(self.token(7, 1000), now=1010, cache=tokens.ReplayCache()), 7)
+
+    def test_expired_token(self):
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.verify_token(self.token(7, 1000), now=1301, cache=tokens.ReplayCache())
+
+    def test_replayed_token(self):
+        replay = tokens.ReplayCache()
+        token = self.token(7, 1000)
+        tokens.verify_token(token, now=1010, cache=replay)
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.verify_token(token, now=1020, cache=replay)
+
+    def test_bad_signature(self):
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.verify_token(self.token(7, 1000, signature="0" * 64), now=1010, cache=tokens.ReplayCache())
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.verify_token("pas-un-token", now=1010, cache=tokens.ReplayCache())
+
+    def test_non_ascii_signature(self):
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.verify_token(self.token(7, 1000, signature="é"), now=1010, cache=tokens.ReplayCache())
+
+    def test_endpoint_rejects_non_ascii_signature(self):
+        response = self.client.get("/token/verify/", {"token": self.token(7, 1000, signature="é")})
+        self.assertEqual(response.status_code, 403)
+
+
+##############################################
+# Rôle dénormalisé (User.role)               #
+##############################################
+class RoleSyncTests(TestCase):
+
+    def setUp(self):
+        self.entreprise = Entreprise.objects.create(
+            Entreprise_Name="Rôles", Entreprise_Num_Customer_Allow=5, Entreprise_Num_Supervisor_Allow=5,
+        )
+        self.compte = make_compte(self.entreprise, "role@test.fr")
+        self.customer = Group.objects.get(name="Customer")
+        self.supervisor = Group.objects.get(name="Supervisor")
+
+    def role(self):
+        return User.objects.get(pk=self.compte.pk).role
+
+    def test_forward_add_remove_clear(self):
+        self.compte.groups.add(self.customer)
+        self.assertEqual(self.role(), "Customer")
+        self.compte.groups.add(self.supervisor)
+        self.compte.groups.remove(self.customer)
+        self.assertEqual(self.role(), "Supervisor")
+        self.compte.groups.clear()
+        self.assertEqual(self.role(), "")
+
+    def test_reverse_add_remove_clear(self):
+        self.customer.user_set.add(self.compte)
+        self.assertEqual(self.role(), "Customer")
+        self.customer.user_set.remove(self.compte)
+        self.assertEqual(self.role(), "")
+        self.supervisor.user_set.add(self.compte)
+        self.supervisor.user_set.clear()
+        self.assertEqual(self.role(), "")
+
+
+##############################################
+# Limitation des tentatives de connexion     #
+##############################################
+@override_settings(
+    SKT_RATELIMIT_ENABLED=True, SKT_RATELIMIT_LOGIN_IP=(3, 60), SKT_RATELIMIT_LOGIN_EMAIL=(2, 60),
+    SKT_RATELIMIT_TRUST_FORWARDED=False, SKT_HASHER_WORKERS=0,
+)
+class RateLimitTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, email, password="mauvais", **extra):
+        return self.client.post("/connection/", {"username": email, "password": password}, **extra)
+
+    def test_email_limit(self):
+        codes = [self.post("cible@test.fr").status_code for _ in range(3)]
+        self.assertEqual(codes, [403, 403, 429])
+
+    def test_ip_limit_counts_failures_and_ignores_forwarded(self):
+        codes = [
+            self.post(f"inconnu{i}@test.fr", HTTP_X_FORWARDED_FOR=f"10.0.0.{i}").status_code
+            for i in range(4)
+        ]
+        self.assertEqual(codes, [403, 403, 403, 429])
+
+    def test_successful_logins_do_not_count_per_ip(self):
+        for i in range(5):
+            User.objects.create_user(email=f"ok{i}@test.fr", password="pw", is_staff=True)
+        codes = {self.post(f"ok{i}@test.fr", password="pw").status_code for i in range(5)}
+        self.assertNotIn(429, codes)
+
+
+##############################################
+# Synthèse d'utilisation par entreprise      #
+##############################################
+class UsageTests(TestCase):
+
+    def setUp(self):
+        self.entreprise = Entreprise.objects.create(
+            Entreprise_Name="Synthèse", Entreprise_Num_Customer_Allow=5, Entreprise_Num_User_Allow=5,
+        )
+
+    def assertUsage(self, expected):
+        self.assertEqual(usage_rows(self.entreprise), expected)
+        # Les différences appliquées donnent le même résultat qu'un recalcul complet
+        usage.rebuild([self.entreprise.pk])
+        self.assertEqual(usage_rows(self.entreprise), expected)
+
+    def test_create_role_change_delete(self):
+        compte = make_compte(self.entreprise, "u1@test.fr", "Customer")
+        make_compte(self.entreprise, "u2@test.fr", "Customer")
+        self.assertUsage({"Customer": (2, 2)})
+
+        compte.groups.set([Group.objects.get(name="SKT_User")])
+        self.assertUsage({"Customer": (1, 1), "SKT_User": (1, 1)})
+
+        compte.is_active = False
+        compte.save()
+        self.assertUsage({"Customer": (1, 1), "SKT_User": (0, 1)})
+
+        compte.delete()
+        self.assertUsage({"Customer": (1, 1)})
+
+    def test_sweep_licences(self):
+        Entreprise.objects.filter(pk=self.entreprise.pk).update(
+            Entreprise_Licence_Date_Start=date(2020, 1, 1), Entreprise_Licence_Date_End=date(2021, 1, 1),
+        )
+        make_compte(self.entreprise, "s1@test.fr", "SKT_User")
+        call_command("sweep_licences", stdout=mock.MagicMock())
+        self.assertUsage({"SKT_User": (0, 1)})
+
+
+##############################################
+# Permissions en cache                       #
+##############################################
+@mock.patch("SKT_account.permissions.shared_cache", return_value=True)
+class PermissionCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="perm@test.fr", password="pw")
+        self.computed = 0
+
+    def compute(self):
+        self.computed += 1
+        return {"SKT_account.view_entreprise"} if self.computed > 1 else set()
+
+    def cached(self):
+        # Nouvelle instance à chaque fois : versions relues comme dans une nouvelle requête
+        return permissions.cached_permissions(User.objects.get(pk=self.user.pk), "user", self.compute)
+
+    def test_cached_until_user_bump(self, _shared):
+        self.assertEqual(self.cached(), set())
+        self.assertEqual(self.cached(), set())
+        self.assertEqual(self.computed, 1)
+        permissions.bump_users([self.user.pk])
+        self.assertEqual(self.cached(), {"SKT_account.view_entreprise"})
+
+    def test_global_bump(self, _shared):
+        self.cached()
+        permissions.bump_all()
+        self.cached()
+        self.assertEqual(self.computed, 2)
+
+    def test_permission_change_invalidates(self, _shared):
+        self.user.user_permissions.add(Permission.objects.get(codename="view_entreprise"))
+        user = User.objects.get(pk=self.user.pk)
+        self.assertTrue(user.has_perm("SKT_account.view_entreprise"))
+        self.user.user_permissions.clear()
+        self.assertFalse(User.objects.get(pk=self.user.pk).has_perm("SKT_account.view_entreprise"))
+
+
+##############################################
+# Fichiers statiques précompressés           #
+##############################################
+class StaticFilesTests(TestCase):
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        data = b"body { color: black; }\n" * 50
+        with open(os.path.join(root.name, "style.css"), "wb") as f:
+            f.write(data)
+        with open(os.path.join(root.name, "style.css.gz"), "wb") as f:
+            f.write(gzip.compress(data))
+        settings_override = override_settings(STATIC_ROOT=root.name, STATIC_URL="/static/")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def get(self, **headers):
+        # Nouveau client : le middleware lit STATIC_ROOT à son initialisation
+        return Client().get("/static/style.css", headers=headers)
+
+    def test_gzip_variant_keeps_original_filename(self):
+        response = self.get(accept_encoding="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Disposition"], 'inline; filename="style.css"')
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_refused_encoding(self):
+        for header in ("gzip;q=0", "br, gzip;q=0", "*;q=0", ""):
+            self.assertFalse(self.get(accept_encoding=header).has_header("Content-Encoding"), header)
+        self.assertEqual(self.get(accept_encoding="*")["Content-Encoding"], "gzip")
+
+    def test_conditional_get(self):
+        response = self.get(accept_encoding="gzip")
+        self.assertTrue(response.has_header("Last-Modified"))
+        self.assertEqual(self.get(accept_encoding="gzip", if_none_match=response["ETag"]).status_code, 304)
+        self.assertEqual(self.get(if_modified_since=response["Last-Modified"]).status_code, 304)
+        # La variante non compressée a son propre ETag
+        self.assertEqual(self.get(if_none_match=response["ETag"]).status_code, 200)
+
+    async def test_async_path(self):
+        response = await AsyncClient().get("/static/style.css", headers={"accept-encoding": "gzip"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(gzip.decompress(content), b"body { color: black; }\n" * 50)
+
+
+##############################################
+# Pages de gestion (ETag, fragments en cache)#
+##############################################
+class ManagePageTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user(email="staff@test.fr", password="pw", is_staff=True))
+        self.entreprise = Entreprise.objects.create(Entreprise_Name="Première")
+
+    def get(self, **headers):
+        return self.client.get("/entreprises/", headers=headers)
+
+    @mock.patch("SKT_account.pagination._shared", return_value=True)
+    def test_etag_304_then_invalidated_on_save(self, _shared):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertEqual(self.get(if_none_match=etag).status_code, 304)
+
+        self.entreprise.Entreprise_Name = "Renommée"
+        self.entreprise.save()
+        response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertContains(response, "Renommée")
+
+    def test_no_shared_cache_no_304_nor_fragment(self):
+        response = self.get()
+        self.assertFalse(response.has_header("ETag"))
+        # Écriture sans signal : visible immédiatement, aucun fragment en cache local
+        Entreprise.objects.filter(pk=self.entreprise.pk).update(Entreprise_Name="Sans signal")
+        response = self.get(if_none_match='"entreprises-1-0"')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Sans signal")
+
+
+##############################################
+# Connexion en une requête                   #
+##############################################
+@override_settings(SKT_RATELIMIT_ENABLED=False, SKT_HASHER_WORKERS=0, SKT_SECRET_KEY="secret-de-test")
+class LoginQueryTests(TestCase):
+
+    def test_skt_user_login_single_query(self):
+        entreprise = Entreprise.objects.create(Entreprise_Name="Connexion", Entreprise_Num_User_Allow=1)
+        compte = make_compte(entreprise, "connexion@test.fr", "SKT_User")
+        compte.set_password("pw")
+        compte.save()
+
+        # Utilisateur, Compte, Entreprise et rôle en une seule requête SQL
+        with self.assertNumQueries(1):
+            response = self.client.post("/connection/", {"username": "connexion@test.fr", "password": "pw"})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response["Location"].startswith("https://"))
+
+
+##############################################
+# Import de comptes (import_comptes)         #
+##############################################
+class ImportComptesTests(TestCase):
+
+    def setUp(self):
+        self.entreprise = Entreprise.objects.create(Entreprise_Name="Import", Entreprise_Num_User_Allow=2)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "comptes.csv")
+
+    def run_import(self, *rows):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("email,entreprise,role\n")
+            f.writelines(f"{email},{entreprise},SKT_User\n" for email, entreprise in rows)
+        call_command("import_comptes", self.path, "--workers", "1", stdout=mock.MagicMock())
+
+    def test_import_reserves_seats(self):
+        self.run_import(("i1@test.fr", self.entreprise.pk), ("i2@test.fr", self.entreprise.pk))
+        self.assertEqual(Compte.objects.filter(Compte_IDEntreprise=self.entreprise, role="SKT_User").count(), 2)
+        self.assertEqual(counters(self.entreprise), (0, 2))
+
+    def test_quota_exceeded(self):
+        with self.assertRaisesMessage(CommandError, f"Quota dépassé pour l'entreprise {self.entreprise.pk}"):
+            self.run_import(*((f"q{i}@test.fr", self.entreprise.pk) for i in range(3)))
+        self.assertFalse(Compte.objects.exists())
+        self.assertEqual(counters(self.entreprise), (0, 0))
+
+    def test_unknown_entreprise_names_the_row(self):
+        with self.assertRaisesMessage(CommandError, "Ligne 2 : entreprise 999999 introuvable pour x2@test.fr"):
+            self.run_import(("x1@test.fr", self.entreprise.pk), ("x2@test.fr", 999999))
+        self.assertFalse(Compte.objects.exists())
+
+
+##############################################
+# Vues de connexion synchrones / asynchrones #
+##############################################
+@override_settings(
+    SKT_RATELIMIT_ENABLED=False, SKT_HASHER_WORKERS=0, SKT_SECRET_KEY="secret-de-test",
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class LoginParityTests(TestCase):
+
+    def setUp(self):
+        self.entreprise = Entreprise.objects.create(
+            Entreprise_Name="Parité", Entreprise_Num_User_Allow=5, Entreprise_Num_Customer_Allow=5,
+        )
+        User.objects.create_user(email="staff@test.fr", password="pw", is_staff=True)
+        admin = User.objects.create_user(email="admin@test.fr", password="pw")
+        admin.groups.add(Group.objects.get(name="Administrator"))
+        for email, group in (("user@test.fr", "SKT_User"), ("client@test.fr", "Customer")):
+            compte = make_compte(self.entreprise, email, group)
+            compte.set_password("pw")
+            compte.save()
+
+    def request(self, email, password):
+        request = RequestFactory().post("/connection/", {"username": email, "password": password})
+        request.session = SessionStore()
+        request.user = AnonymousUser()
+        return request
+
+    def call(self, view, email, password):
+        try:
+            return view(self.request(email, password))
+        except PermissionDenied as e:
+            return e
+
+    def summary(self, response):
+        if isinstance(response, PermissionDenied):
+            return ("403", str(response))
+        if response.status_code == 302:
+            # Tokens émis à des instants différents : comparés par l'IDUser qu'ils portent
+            url = urlsplit(response["Location"])
+            token = parse_qs(url.query)["token"][0]
+            return (302, url.netloc, tokens.verify_token(token, cache=tokens.ReplayCache()))
+        return (response.status_code, response.content)
+
+    def test_same_responses(self):
+        for email, password in (
+            ("staff@test.fr", "pw"), ("admin@test.fr", "pw"), ("user@test.fr", "pw"),
+            ("client@test.fr", "pw"), ("user@test.fr", "mauvais"), ("inconnu@test.fr", "pw"),
+        ):
+            with self.subTest(email=email, password=password):
+                expected = self.summary(self.call(views.connectionHandler, email, password))
+                actual = self.summary(self.call(async_to_sync(async_views.connectionHandler), email, password))
+                self.assertEqual(actual, expected)
+
+
+##############################################
+# Pagination par clé des pages de gestion    #
+##############################################
+@override_settings(SKT_LISTING_PAGE_SIZE=2)
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.ids = [Entreprise.objects.create(Entreprise_Name=f"E{i}").pk for i in range(5)]
+
+    def test_next_cursor_walks_all_rows(self):
+        seen, after, pages = [], None, 0
+        while True:
+            page = pagination.entreprises_page(after)
+            pages += 1
+            seen += [row.pk for row in page.items]
+            self.assertEqual(page.count, 5)
+            if page.next_cursor is None:
+                break
+            self.assertEqual(page.next_cursor, page.items[-1].pk)
+            after = page.next_cursor
+        self.assertEqual((seen, pages), (self.ids, 3))
+
+    def test_exact_last_page_has_no_cursor(self):
+        page = pagination.entreprises_page(self.ids[2])
+        self.assertEqual([row.pk for row in page.items], self.ids[3:])
+        self.assertIsNone(page.next_cursor)
+
+    def test_parse_cursor(self):
+        self.assertEqual(pagination.parse_cursor("12"), 12)
+        self.assertIsNone(pagination.parse_cursor("abc"))
+        self.assertIsNone(pagination.parse_cursor(None))
+
+    def test_view_links_next_page(self):
+        self.client.force_login(User.objects.create_user(email="staff@test.fr", password="pw", is_staff=True))
+        response = self.client.get("/entreprises/", {"after": self.ids[0]})
+        self.assertContains(response, "E1")
+        self.assertNotContains(response, "E0")
+        self.assertContains(response, f"?after={self.ids[2]}")
+
+
+##############################################
+# Exports CSV / JSONL                        #
+##############################################
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user(email="staff@test.fr", password="pw", is_staff=True))
+        self.active = Entreprise.objects.create(Entreprise_Name="Active", Entreprise_Num_User_Allow=5,
+                                                Entreprise_Num_Customer_Allow=5)
+        self.disabled = Entreprise.objects.create(Entreprise_Name="Désactivée", Entreprise_Num_User_Allow=5)
+        make_compte(self.active, "user@test.fr", "SKT_User")
+        make_compte(self.active, "client@test.fr", "Customer")
+        make_compte(self.disabled, "ancien@test.fr", "SKT_User")
+        Entreprise.objects.filter(pk=self.disabled.pk).update(Entreprise_Licence_Statut="DIS")
+
+    def export(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode(), response
+
+    def test_comptes_csv_filtered_by_role(self):
+        content, response = self.export("/exports/comptes/", role="SKT_User")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="comptes.csv"')
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual(sorted(row["email"] for row in rows), ["ancien@test.fr", "user@test.fr"])
+
+    def test_comptes_jsonl_filtered_by_statut_and_role(self):
+        content, response = self.export("/exports/comptes/", format="jsonl", statut="ACT", role="SKT_User")
+        self.assertTrue(response["Content-Type"].startswith("application/x-ndjson"))
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([(row["email"], row["entreprise"]) for row in rows], [("user@test.fr", "Active")])
+
+    def test_entreprises_filtered_by_statut(self):
+        content, _response = self.export("/exports/entreprises/", statut="DIS")
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual([row["name"] for row in rows], ["Désactivée"])
+
+    def test_invalid_parameters(self):
+        for url, params in (
+            ("/exports/comptes/", {"format": "xml"}),
+            ("/exports/comptes/", {"statut": "XXX"}),
+            ("/exports/comptes/", {"role": "Inconnu"}),
+            ("/exports/entreprises/", {"statut": "XXX"}),
+        ):
+            with self.subTest(url=url, params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+
+
+##############################################
+# Recherche de comptes (préfixes, SQLite)    #
+##############################################
+@skipUnless(connection.vendor != "postgresql", "recherche par préfixe : bases autres que PostgreSQL")
+class PrefixSearchTests(TestCase):
+
+    def setUp(self):
+        entreprise = Entreprise.objects.create(Entreprise_Name="Recherche")
+        for email, first_name, last_name in (
+            ("jdupont@test.fr", "Martin", "Dupont"),
+            ("martin.leroy@test.fr", "Paul", "Leroy"),
+            ("amartin@test.fr", "Anne", "Durand"),
+            ("claire@test.fr", "Claire", "Martinez"),
+        ):
+            Compte.objects.create(email=email, first_name=first_name, last_name=last_name,
+                                  Compte_IDEntreprise=entreprise)
+
+    def emails(self, query):
+        return [compte.email for compte in search_comptes(query)]
+
+    def test_prefix_match_and_email_first(self):
+        # « amartin » ne commence par « martin » dans aucun champ ; la correspondance sur l'email est en tête
+        self.assertEqual(
+            self.emails("MARTIN"), ["martin.leroy@test.fr", "jdupont@test.fr", "claire@test.fr"],
+        )
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.emails("martin dup"), ["jdupont@test.fr"])
+        self.assertEqual(self.emails("martin durand"), [])
+
+    def test_short_query(self):
+        self.assertEqual(self.emails("ma"), [])
+
+    def test_endpoint(self):
+        self.client.force_login(User.objects.create_user(email="staff@test.fr", password="pw", is_staff=True))
+        response = self.client.get("/comptes/search/", {"q": "martin", "limit": 1})
+        self.assertEqual([row["email"] for row in response.json()["results"]], ["martin.leroy@test.fr"])
+        self.assertEqual(self.client.get("/comptes/search/", {"q": "martin", "limit": "x"}).status_code, 400)
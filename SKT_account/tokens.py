@@ -0,0 +1,117 @@
+"""
+Vérification des tokens de passage vers l'application (voir views.generate_secure_url).
+
+Format : base64url("IDUser|timestamp|signature"), signature = HMAC-SHA256(SKT_SECRET_KEY, "IDUser|timestamp").
+La vérification n'accède pas à la base : signature comparée en temps constant,
+expiration au-delà de SKT_URL_TIMEOUT secondes, rejeu bloqué par un cache mémoire
+borné des signatures déjà présentées.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseForbidden
+from django.utils.translation import gettext_lazy as _
+
+
+class InvalidToken(PermissionDenied):
+    """Token mal formé, mal signé, expiré ou déjà utilisé."""
+
+
+class ReplayCache:
+    """
+    Ensemble borné de nonces avec date d'expiration.
+    Les entrées sont insérées dans l'ordre de leur expiration (à quelques secondes près) :
+    les expirées sont purgées depuis le début, et la plus ancienne est évincée si la taille maximale est atteinte.
+    """
+
+    def __init__(self, max_size=100_000):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _purge(self, now):
+        while self._entries:
+            nonce, expires = next(iter(self._entries.items()))
+            if expires > now:
+                break
+            self._entries.popitem(last=False)
+
+    def add(self, nonce, expires, now=None):
+        """Enregistre ``nonce`` jusqu'à ``expires``. Retourne False s'il était déjà présent (rejeu)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._purge(now)
+            if nonce in self._entries:
+                return False
+            if len(self._entries) >= self.max_size:
+                self._entries.popitem(last=False)
+            self._entries[nonce] = expires
+            return True
+
+    def __len__(self):
+        return len(self._entries)
+
+
+replay_cache = ReplayCache(getattr(settings, "SKT_TOKEN_REPLAY_MAX", 100_000))
+
+
+def sign(message):
+    """Signature HMAC-SHA256 (hexadécimale) d'un message avec SKT_SECRET_KEY."""
+    return hmac.new(settings.SKT_SECRET_KEY.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+def verify_token(token, now=None, cache=replay_cache):
+    """
+    Vérifie un token et retourne l'IDUser qu'il porte.
+    Lève InvalidToken si le token est invalide, expiré ou rejoué.
+    """
+    now = time.time() if now is None else now
+    timeout = int(settings.SKT_URL_TIMEOUT)
+
+    try:
+        raw = base64.urlsafe_b64decode(token.encode() + b"=" * (-len(token) % 4)).decode()
+        id_user, timestamp, signature = raw.split("|")
+        issued = int(timestamp)
+    except (ValueError, binascii.Error, UnicodeError):
+        raise InvalidToken(_("Token mal formé."))
+
+    # Comparaison sur des octets : compare_digest refuse les chaînes non ASCII (TypeError)
+    if not hmac.compare_digest(sign(f"{id_user}|{timestamp}").encode(), signature.encode()):
+        raise InvalidToken(_("Signature du token invalide."))
+
+    # Tolérance d'une seconde pour les horloges légèrement décalées
+    if issued > now + 1 or now - issued > timeout:
+        raise InvalidToken(_("Token expiré."))
+
+    if not cache.add(signature, issued + timeout, now):
+        raise InvalidToken(_("Token déjà utilisé."))
+
+    return int(id_user)
+
+
+class TokenMiddleware:
+    """
+    Middleware pour l'application cible : si la requête porte ``?token=``, il est vérifié
+    et l'IDUser est exposé dans ``request.skt_user_id`` ; un token invalide reçoit un 403.
+    À ajouter dans MIDDLEWARE du projet qui reçoit la redirection (SKT_URL_WEBAPP).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.skt_user_id = None
+        token = request.GET.get("token")
+        if token:
+            try:
+                request.skt_user_id = verify_token(token)
+            except InvalidToken as e:
+                return HttpResponseForbidden(str(e))
+        return self.get_response(request)
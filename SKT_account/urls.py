@@ -1,14 +1,26 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 
 # import des views par défaut du système d'authentification
 # de django, qui sera renommé auth_views
 from django.contrib.auth import views as auth_views
-from SKT_account import views
+from SKT_account import views, async_views
+from SKT_account.metrics import metrics_view
+
+# Sous ASGI (SKT_ASYNC_VIEWS), les vues asynchrones remplacent les vues synchrones
+login_views = async_views if settings.SKT_ASYNC_VIEWS else views
 
 app_name = "accounts" # déclare la nmaespace de l'app
 urlpatterns = [
   path('', auth_views.LoginView.as_view(template_name='login.html'), name='login'),
-  path('connection/', views.connectionHandler),
-  path("users/create/", views.create_user_view, name="user_create"),
+  path('connection/', login_views.connectionHandler),
+  path("users/create/", login_views.create_user_view, name="user_create"),
+  path("users/", views.users_manage_view, name="users_manage"),
+  path("entreprises/", views.entreprises_manage_view, name="entreprises_manage"),
+  path("comptes/search/", views.search_comptes_view, name="search_comptes"),
+  path("exports/comptes/", views.export_comptes_view, name="export_comptes"),
+  path("exports/entreprises/", views.export_entreprises_view, name="export_entreprises"),
+  path("token/verify/", views.verify_token_view, name="token_verify"),
+  path("metrics/", metrics_view, name="metrics"),
 ]
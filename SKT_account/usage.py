@@ -0,0 +1,105 @@
+"""
+Synthèse d'utilisation par Entreprise : une ligne EntrepriseUsage par (entreprise, rôle).
+
+Les compteurs (comptes actifs, comptes au total) sont tenus à jour par différences :
+chaque changement de compte (création, suppression, changement d'entreprise, de rôle
+ou d'activation) se traduit par un ``UPDATE ... SET n = n + delta`` sur les lignes
+concernées (voir signals.py et bulk.py). La commande rebuild_usage recalcule la table
+entière (ou certaines entreprises) depuis les comptes, après un update() ou un import
+qui contournerait les signaux.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from .models import Compte, EntrepriseUsage
+
+
+def snapshot(user_ids):
+    """État des comptes ``user_ids`` vu par la synthèse : {pk: (entreprise_id, rôle, actif)}."""
+    return {
+        pk: (entreprise_id, role, is_active)
+        for pk, entreprise_id, role, is_active in Compte.objects.filter(pk__in=list(user_ids)).values_list(
+            "pk", "Compte_IDEntreprise_id", "role", "is_active"
+        )
+    }
+
+
+def deltas(before, after):
+    """Différences entre deux listes d'états : {(entreprise_id, rôle): (delta actifs, delta total)}."""
+    active = Counter()
+    total = Counter()
+    for states, sign in ((before, -1), (after, 1)):
+        for entreprise_id, role, is_active in states:
+            total[entreprise_id, role] += sign
+            if is_active:
+                active[entreprise_id, role] += sign
+    return {
+        key: (active[key], total[key])
+        for key in total.keys() | active.keys()
+        if active[key] or total[key]
+    }
+
+
+def apply(changes):
+    """Applique ``changes`` ({(entreprise_id, rôle): (delta actifs, delta total)}), une requête par ligne."""
+    for (entreprise_id, role), (d_active, d_total) in sorted(changes.items()):
+        rows = EntrepriseUsage.objects.filter(Usage_IDEntreprise_id=entreprise_id, Usage_Role=role)
+        update = {"Usage_Active": F("Usage_Active") + d_active, "Usage_Total": F("Usage_Total") + d_total}
+        if rows.update(**update):
+            continue
+        try:
+            # Première ligne de ce couple : création (une création concurrente retombe sur l'UPDATE)
+            with transaction.atomic():
+                EntrepriseUsage.objects.create(
+                    Usage_IDEntreprise_id=entreprise_id, Usage_Role=role,
+                    Usage_Active=max(d_active, 0), Usage_Total=max(d_total, 0),
+                )
+        except IntegrityError:
+            rows.update(**update)
+
+
+def track(before, after):
+    """Applique les différences entre deux snapshot() des mêmes comptes."""
+    apply(deltas(before.values(), after.values()))
+
+
+def rebuild(entreprise_ids=None):
+    """
+    Recalcule la synthèse depuis les comptes (toutes les entreprises, ou ``entreprise_ids``).
+    Retourne le nombre de lignes écrites.
+    """
+    comptes = Compte.objects.all()
+    existing = EntrepriseUsage.objects.all()
+    if entreprise_ids is not None:
+        entreprise_ids = list(entreprise_ids)
+        comptes = comptes.filter(Compte_IDEntreprise_id__in=entreprise_ids)
+        existing = existing.filter(Usage_IDEntreprise_id__in=entreprise_ids)
+
+    rows = (
+        comptes.order_by()
+        .values("Compte_IDEntreprise_id", "role")
+        .annotate(total=Count("pk"), active=Count("pk", filter=Q(is_active=True)))
+    )
+    with transaction.atomic():
+        existing.delete()
+        objs = EntrepriseUsage.objects.bulk_create(
+            [
+                EntrepriseUsage(
+                    Usage_IDEntreprise_id=row["Compte_IDEntreprise_id"], Usage_Role=row["role"],
+                    Usage_Active=row["active"], Usage_Total=row["total"],
+                )
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+    return len(objs)
+
+
+def usage_for(entreprise_id):
+    """Utilisation d'une entreprise en une requête : {rôle: EntrepriseUsage}."""
+    return {
+        usage.Usage_Role: usage
+        for usage in EntrepriseUsage.objects.filter(Usage_IDEntreprise_id=entreprise_id)
+    }
@@ -1,23 +1,34 @@
 from django.shortcuts import render,redirect
+from django.http import HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 
-from django.utils import timezone
 from django.core.exceptions import PermissionDenied
 from django.utils.translation import gettext_lazy as _
-from django.contrib.auth import authenticate
-from SKT_account.models import Entreprise, Compte
+from django.contrib.auth import authenticate, login
+from django.contrib.auth.decorators import login_required
 
-from django.contrib.auth.models import Group
 
 
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from .forms import UserCreateForm
+from .licence import compute_licence_state
+from .backends import get_primary_group, get_compte
+from .hashing import HasherSaturated
+from . import tokens
+from .pagination import admin_users_page, entreprises_page, parse_cursor, page_version, page_cache_timeout
+from .ratelimit import login_ratelimit
+from . import exports
+from .search import search_results
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date, quote_etag
 
 # Variables globales
 from django.conf import settings
 
 # Pour l'encodage du Token
-import hmac, hashlib, base64, time 
+import base64, time 
 from urllib.parse import urlencode
 
 
@@ -31,19 +42,125 @@ def create_user_view(request):
     if request.method == "POST":
         form = UserCreateForm(request.POST)
         if form.is_valid():
-            user = form.save()
+            try:
+                user = form.save()
+            except HasherSaturated:
+                return service_unavailable()
             messages.success(request, f"Utilisateur créé : {user.email}")
-            # Récupérer le groupe "Administrator"
-            admin_group = Group.objects.get(name="Administrator")
-
-            # Liste des utilisateurs dans ce groupe
-            users_in_admin_group = admin_group.user_set.all()
-            return render(request, "users_manage.html", {'users': users_in_admin_group})  
+            # Liste des utilisateurs du groupe "Administrator" (première page)
+            return render(request, "users_manage.html", page_context(page_version("users"), admin_users_page()))
     else:
         form = UserCreateForm()
 
     return render(request, "create_user.html", {"form": form})
 
+
+def page_context(version, page, after=None):
+    """
+    Contexte des templates de gestion : page (lignes, total, curseur suivant) et clé du fragment
+    en cache (version de la liste, curseur). ``page`` peut être chargée à la demande (manage_page).
+    La version est lue avant les lignes : une modification concurrente ne peut pas mettre en
+    cache d'anciennes lignes sous la nouvelle version.
+    """
+    return {"page": page, "version": version, "after": after or "", "fragment_timeout": page_cache_timeout()}
+
+
+def manage_page(request, name, template, loader):
+    """
+    Page de gestion avec requêtes conditionnelles : ETag / Last-Modified tirés de la version
+    de la liste (une lecture du cache). Réponse 304 si le client a déjà cette version ;
+    sinon rendu avec la page chargée seulement si le fragment du tableau n'est pas en cache.
+    Sans cache partagé (page_version à None), la page est toujours rendue complètement.
+    """
+    after = parse_cursor(request.GET.get("after"))
+    version = page_version(name)
+    if version is None:
+        # Sans cache partagé, pas de version commune aux workers : ni 304 ni fragment en cache
+        response = render(request, template, page_context(None, loader(after), after))
+    else:
+        etag = quote_etag(f"{name}-{version}-{after or 0}")
+        last_modified = version // 10**9
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            page = SimpleLazyObject(lambda: loader(after))
+            response = render(request, template, page_context(version, page, after))
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+    # Revalidation à chaque affichage, réponse propre à l'utilisateur connecté
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@staff_member_required
+def users_manage_view(request):
+    """
+    Liste paginée des administrateurs (?after=<id> pour la page suivante).
+    """
+    return manage_page(request, "users", "users_manage.html", admin_users_page)
+
+
+@login_required(login_url="/")
+def entreprises_manage_view(request):
+    """
+    Liste paginée des entreprises (?after=<IDEntreprise> pour la page suivante).
+    Réservée au staff et au groupe "Administrator".
+    """
+    if not (request.user.is_staff or get_primary_group(request.user) == "Administrator"):
+        raise PermissionDenied(_("Accès réservé aux administrateurs."))
+    return manage_page(request, "entreprises", "entreprises_manage.html", entreprises_page)
+
+def export_response(request, name, rows_function, **filters):
+    """Réponse en flux (CSV ou JSONL selon ?format=) ; 400 si le format ou un filtre est invalide."""
+    fmt = request.GET.get("format", "csv")
+    if fmt not in exports.FORMATS:
+        return HttpResponseBadRequest(_("Format inconnu."))
+    try:
+        header, rows = rows_function(**filters)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    response = StreamingHttpResponse(exports.render(fmt, header, rows), content_type=exports.CONTENT_TYPES[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{name}.{fmt}"'
+    return response
+
+
+@staff_member_required
+def export_comptes_view(request):
+    """
+    Export de tous les comptes avec leur entreprise et leur rôle.
+    Filtres : ?statut=<ACT|DIS|ARC> (licence de l'entreprise), ?role=<groupe> ; ?format=csv|jsonl.
+    """
+    return export_response(
+        request, "comptes", exports.compte_rows,
+        statut=request.GET.get("statut"), role=request.GET.get("role"),
+    )
+
+
+@staff_member_required
+def export_entreprises_view(request):
+    """
+    Export de toutes les entreprises et de leurs licences.
+    Filtre : ?statut=<ACT|DIS|ARC> ; ?format=csv|jsonl.
+    """
+    return export_response(request, "entreprises", exports.entreprise_rows, statut=request.GET.get("statut"))
+
+@staff_member_required
+def search_comptes_view(request):
+    """
+    Recherche de comptes (?q=<texte>, ?limit=<n> au plus SKT_SEARCH_MAX_LIMIT), résultats classés par pertinence.
+    """
+    max_limit = getattr(settings, "SKT_SEARCH_MAX_LIMIT", 100)
+    try:
+        limit = min(int(request.GET.get("limit", 20)), max_limit)
+    except ValueError:
+        return HttpResponseBadRequest(_("Paramètre limit invalide."))
+    return JsonResponse({"results": search_results(request.GET.get("q", ""), max(limit, 1))})
+
+def service_unavailable():
+    response = HttpResponse(_("Service momentanément indisponible, veuillez réessayer."), status=503)
+    response["Retry-After"] = "1"
+    return response
+
 # Génération du TOKEN et de l'URL pour appel de l'app
 def generate_secure_url(IDUser, URL):
 	#récupération de l’heure
@@ -53,7 +170,7 @@ def generate_secure_url(IDUser, URL):
 	message = f"{IDUser}|{timestamp}"
 
 	#création de la signature à partir de la clé secrète et du message
-	signature = hmac.new(settings.SKT_SECRET_KEY.encode(), message.encode(), hashlib.sha256).hexdigest()
+	signature = tokens.sign(message)
 
 	#création du token complet 
 	token_raw = f"{message}|{signature}"
@@ -64,12 +181,28 @@ def generate_secure_url(IDUser, URL):
 	#renvoi de l’URL complète
 	return f"https://{URL}?token={token_b64}"
 
+def verify_token_view(request):
+    """
+    Vérification d'un token de passage (?token=...) sans accès à la base.
+    Réponse : {"user": IDUser} ou 403 si le token est invalide, expiré ou rejoué.
+    """
+    try:
+        id_user = tokens.verify_token(request.GET.get("token", ""))
+    except tokens.InvalidToken as e:
+        return JsonResponse({"error": str(e)}, status=403)
+    return JsonResponse({"user": id_user})
+
+@login_ratelimit
 def connectionHandler(request) :
 
     #récupération de l'utilisateur connecté
     email = request.POST.get('username')
     pwd = request.POST.get('password')
-    user = authenticate(request, username = email, password = pwd) 
+    try:
+        user = authenticate(request, username = email, password = pwd) 
+    except HasherSaturated:
+        # Pool de hachage saturé : rejet immédiat plutôt que d'empiler les requêtes
+        return service_unavailable()
 
     #vérification de l'authenification
     if not user :
@@ -77,60 +210,62 @@ def connectionHandler(request) :
 
     #si c'est un SuperAdministrateur
     if user.is_authenticated and user.is_staff and user.is_active :
-            
-            # Récupérer le groupe "Administrator"
-            admin_group = Group.objects.get(name="Administrator")
 
-            # Liste des utilisateurs dans ce groupe
-            users_in_admin_group = admin_group.user_set.all()
-           
+            # Ouverture de session pour la navigation dans les pages suivantes
+            login(request, user)
+
+            # Liste des utilisateurs du groupe "Administrator" (première page)
             return render(
                 request,
                 'users_manage.html',
-                {'users': users_in_admin_group}
+                page_context(page_version('users'), admin_users_page())
             )        
 
+    # nom du groupe principal (déjà chargé par le backend d'authentification)
+    role = get_primary_group(user)
+
     #si c'est un Administrateur
-    if user.is_authenticated and user.groups.first().name=="Administrator" and user.is_active :
-            
-            # Liste des entreprises
-            entreprises = Entreprise.objects.all()
-           
+    if user.is_authenticated and role=="Administrator" and user.is_active :
+
+            # Ouverture de session pour la navigation dans les pages suivantes
+            login(request, user)
+
+            # Liste des entreprises (première page)
             return render(
                 request,
                 'entreprises_manage.html',
-                {'entreprises': entreprises}
+                page_context(page_version('entreprises'), entreprises_page())
             )
- 
-    # récupération de l'entreprise
-    compte = Compte.objects.filter(id = user.id).first()
-    if compte :
-        entreprise = compte.Compte_IDEntreprise
-    else :
+
+    # récupération de l'entreprise (déjà jointe par le backend d'authentification)
+    check_licence(get_compte(user))
+
+    #traitement en fonction du groupe de l'utilisateur
+    return role_response(request, user, role)
+
+
+def check_licence(compte):
+    """
+    Vérifie que le compte est rattaché à une entreprise dont la licence est valide.
+    Lève PermissionDenied sinon. Aucune requête : l'entreprise est déjà chargée.
+    """
+    if not compte :
         raise PermissionDenied(_("Utilisateur non affecté à une entreprise"))
-    
-    # Comparaison avec la date du jour (UTC par défaut, convertie en date)
-    today = timezone.now().date()
+
+    # Vérification de la validité de la licence
+    licence = compute_licence_state(compte.Compte_IDEntreprise)
 
     # Vérification de la définition d'une date de début de licence
-    if not entreprise or entreprise.Entreprise_Licence_Date_Start is None:
+    if not licence.defined:
         raise PermissionDenied(_("Aucune date de licence définie pour l'entreprise."))
 
-    # Vérification de la validité de la licence
-    licence = False
-    # La licence est active
-    if entreprise.Entreprise_Licence_Statut == 'ACT' :
-        #La période de licence a démarré
-        if entreprise.Entreprise_Licence_Date_Start <= today :
-            #La période de licence n'est pas finie
-            if entreprise.Entreprise_Licence_Date_End is None or entreprise.Entreprise_Licence_Date_End > today :
-                licence = True
-
-    if not licence :
+    if not licence.valid :
         raise PermissionDenied(_("La licence est invalide"))
 
-    #traitement en fonction du groupe de l'utilisateur
-    match user.groups.first().name:
+
+def role_response(request, user, role):
+    """Réponse de connexion d'un utilisateur d'entreprise selon son groupe (sans requête)."""
+    match role:
         case "SKT_User":
             url = generate_secure_url(user.id, settings.SKT_URL_WEBAPP)
             return redirect(url)
@@ -145,6 +280,3 @@ def connectionHandler(request) :
         request,
         'base.html',
     )
-
-
- 
@@ -0,0 +1,11 @@
+"""
+Mesures de performance des chemins critiques (connexion, passage vers l'application,
+création de compte, pages de gestion).
+
+Utilisation :
+    python -m benchmarks --output bench.json
+    python -m benchmarks --iterations 500 --rows 5000 --fast-hasher
+
+Base SQLite en mémoire par défaut ; PostgreSQL local si BENCH_DB_NAME est défini
+(voir benchmarks/settings.py). La base de test est créée, remplie puis supprimée.
+"""
@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200, help="Mesures par scénario")
+    parser.add_argument("--warmup", type=int, default=20, help="Itérations de chauffe non mesurées")
+    parser.add_argument("--rows", type=int, default=1000,
+                        help="Nombre d'entreprises et d'administrateurs de remplissage")
+    parser.add_argument("--only", nargs="*", help="Scénarios à exécuter (tous par défaut)")
+    parser.add_argument("--fast-hasher", action="store_true",
+                        help="Hachage MD5 : mesure du coût hors PBKDF2")
+    parser.add_argument("--output", help="Fichier JSON des résultats (sortie standard par défaut)")
+    return parser.parse_args()
+
+
+def percentile(values, p):
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100
+    low, high = int(k), min(int(k) + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (k - low)
+
+
+def measure(fn, iterations, warmup):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - t0)
+        total = time.perf_counter() - start
+
+    ms = [t * 1000 for t in timings]
+    return {
+        "iterations": iterations,
+        "ops_per_s": round(iterations / total, 2),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p90_ms": round(percentile(ms, 90), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(max(ms), 3),
+        "queries_per_op": round(len(queries) / iterations, 2),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    if args.fast_hasher:
+        os.environ["BENCH_FAST_HASHER"] = "1"
+
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from .cases import cases
+    from .seed import seed
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        seed(args.rows)
+        scenarios = cases()
+        results = {}
+        for name, fn in scenarios.items():
+            if args.only and name not in args.only:
+                continue
+            print(f"{name}…", file=sys.stderr, flush=True)
+            results[name] = measure(fn, args.iterations, args.warmup)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(),
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "hasher": settings.PASSWORD_HASHERS[0],
+            "rows": args.rows,
+            "warmup": args.warmup,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
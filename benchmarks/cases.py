@@ -0,0 +1,59 @@
+"""Scénarios mesurés : chaque scénario est une fonction sans argument appelée en boucle."""
+import itertools
+
+from django.test import Client
+
+from SKT_account.forms import UserCreateForm
+from SKT_account.views import generate_secure_url
+from SKT_account.models import DEFAULT_GROUPS, User
+
+from .seed import PASSWORD, STAFF_EMAIL, role_email
+
+
+def _login(email, expected):
+    client = Client()
+
+    def run():
+        response = client.post("/connection/", {"username": email, "password": PASSWORD})
+        assert response.status_code == expected, response.status_code
+    return run
+
+
+def _listing(url):
+    client = Client()
+    client.force_login(User.objects.get(email=STAFF_EMAIL))
+
+    def run():
+        response = client.get(url)
+        assert response.status_code == 200, response.status_code
+    return run
+
+
+def _user_create():
+    counter = itertools.count()
+
+    def run():
+        n = next(counter)
+        form = UserCreateForm({
+            "first_name": "Bench", "last_name": f"User {n}",
+            "email": f"created{n}@bench.local",
+            "password1": PASSWORD, "password2": PASSWORD,
+        })
+        assert form.is_valid(), form.errors
+        form.save()
+    return run
+
+
+def cases():
+    """Nom du scénario -> fonction à mesurer."""
+    expected = {"SKT_User": 302}
+    result = {
+        f"login_{role}": _login(role_email(role), expected.get(role, 200))
+        for role in DEFAULT_GROUPS
+    }
+    result["login_staff"] = _login(STAFF_EMAIL, 200)
+    result["generate_secure_url"] = lambda: generate_secure_url(1, "skillteam.app")
+    result["user_create_form_save"] = _user_create()
+    result["users_manage"] = _listing("/users/")
+    result["entreprises_manage"] = _listing("/entreprises/")
+    return result
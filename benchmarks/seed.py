@@ -0,0 +1,47 @@
+"""Jeu de données minimal des benchmarks : une entreprise, un compte par rôle, des lignes de remplissage."""
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+
+from SKT_account.models import Compte, Entreprise, User, DEFAULT_GROUPS
+
+PASSWORD = "Bench-Passw0rd!"
+STAFF_EMAIL = "staff@bench.local"
+
+
+def role_email(role):
+    return f"{role.lower()}@bench.local"
+
+
+def seed(rows):
+    for name in DEFAULT_GROUPS:
+        Group.objects.get_or_create(name=name)
+    groups = {g.name: g for g in Group.objects.filter(name__in=DEFAULT_GROUPS)}
+    encoded = make_password(PASSWORD)
+
+    entreprise = Entreprise.objects.create(
+        Entreprise_Name="Bench",
+        Entreprise_Num_Customer_Allow=999,
+        Entreprise_Num_User_Allow=99999,
+        Entreprise_Num_Supervisor_Allow=9999,
+    )
+
+    # Un compte par rôle pour chaque branche de connectionHandler
+    for role in DEFAULT_GROUPS:
+        compte = Compte.objects.create(
+            email=role_email(role), password=encoded, Compte_IDEntreprise=entreprise
+        )
+        compte.groups.add(groups[role])
+    User.objects.create_superuser(email=STAFF_EMAIL, password=PASSWORD)
+
+    # Volume des pages de gestion
+    Entreprise.objects.bulk_create(
+        [Entreprise(Entreprise_Name=f"Entreprise {i}") for i in range(rows)], batch_size=1000
+    )
+    admins = User.objects.bulk_create(
+        [User(email=f"admin{i}@bench.local", password=encoded, role="Administrator") for i in range(rows)],
+        batch_size=1000,
+    )
+    Membership = User.groups.through
+    Membership.objects.bulk_create(
+        [Membership(user_id=u.pk, group_id=groups["Administrator"].pk) for u in admins], batch_size=1000
+    )
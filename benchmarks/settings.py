@@ -0,0 +1,36 @@
+"""Paramètres Django des benchmarks : ceux du projet, avec une base locale."""
+import os
+
+# DATABASES est remplacé plus bas : le profil SQLite évite d'exiger les identifiants de production
+os.environ.setdefault("SKT_DB_PROFILE", "sqlite")
+
+from skillteam.settings import *  # noqa: F401,F403
+
+if os.environ.get("BENCH_DB_NAME"):
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ["BENCH_DB_NAME"],
+            "USER": os.environ.get("BENCH_DB_USER", "postgres"),
+            "PASSWORD": os.environ.get("BENCH_DB_PASSWORD", ""),
+            "HOST": os.environ.get("BENCH_DB_HOST", "127.0.0.1"),
+            "PORT": os.environ.get("BENCH_DB_PORT", "5432"),
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": ":memory:",
+        }
+    }
+
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+STATICFILES_DIRS = []
+
+# Les benchmarks enchaînent les connexions depuis la même adresse
+SKT_RATELIMIT_ENABLED = False
+
+# Hachage rapide (--fast-hasher) : mesure du coût hors PBKDF2
+if os.environ.get("BENCH_FAST_HASHER") == "1":
+    PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
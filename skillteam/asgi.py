@@ -13,4 +13,7 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skillteam.settings')
 
+# Servi en ASGI : utilisation des vues asynchrones (voir SKT_account/async_views.py)
+os.environ.setdefault('SKT_ASYNC_VIEWS', '1')
+
 application = get_asgi_application()
@@ -0,0 +1,146 @@
+"""
+Configuration de la base de données selon le profil de déploiement (SKT_DB_PROFILE).
+
+Profils :
+- "production" (défaut) : PostgreSQL OVH en TLS ;
+- "local" : PostgreSQL local, sans TLS (développement, tests d'intégration) ;
+- "sqlite" : fichier SQLite BASE_DIR/db.sqlite3 (tests, aucun serveur requis).
+
+Tests et vérifications sans serveur PostgreSQL :
+    SKT_DB_PROFILE=sqlite python manage.py test SKT_account
+    SKT_DB_PROFILE=sqlite python manage.py check
+
+Pour PostgreSQL, les connexions sont réutilisées : pool psycopg (Django ≥ 5.1) si
+psycopg 3 et psycopg_pool sont installés, sinon connexions persistantes (CONN_MAX_AGE)
+vérifiées avant réutilisation (CONN_HEALTH_CHECKS). La poignée de main TLS n'est donc
+plus payée à chaque requête.
+
+Chaque paramètre est surchargeable par variable d'environnement SKT_DB_* (voir database_config).
+Le profil "production" n'a pas de valeur par défaut pour les identifiants et l'hôte :
+SKT_DB_USER, SKT_DB_PASSWORD et SKT_DB_HOST sont obligatoires.
+
+Sous ASGI (SKT_ASYNC_VIEWS=1), sans pool, les connexions ne sont pas persistantes
+(CONN_MAX_AGE = 0) : Django les déconseille hors d'un thread par requête.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import psycopg  # noqa: F401
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    ConnectionPool = None
+
+PROFILES = ("production", "local", "sqlite")
+
+# Valeurs par défaut des profils PostgreSQL (None : variable SKT_DB_* obligatoire)
+POSTGRESQL_DEFAULTS = {
+    "production": {
+        "NAME": "SKT_DB",
+        "USER": None,
+        "PASSWORD": None,
+        "HOST": None,
+        "PORT": "5432",
+        "SSLMODE": "require",
+        "SSLROOTCERT": "",
+    },
+    "local": {
+        "NAME": "SKT_DB",
+        "USER": "postgres",
+        "PASSWORD": "",
+        "HOST": "127.0.0.1",
+        "PORT": "5432",
+        "SSLMODE": "disable",
+        "SSLROOTCERT": "",
+    },
+}
+
+
+def _env(env, name, default):
+    return env.get(f"SKT_DB_{name}", default)
+
+
+def _required(env, profile, name, defaults):
+    value = _env(env, name, defaults[name])
+    if value is None:
+        raise ImproperlyConfigured(f"SKT_DB_{name} doit être défini pour le profil {profile!r}.")
+    return value
+
+
+def pool_available():
+    """Le pool de connexions Django nécessite psycopg 3 et psycopg_pool."""
+    return ConnectionPool is not None
+
+
+def pool_options(env):
+    """Options du pool psycopg (taille, attente, recyclage des connexions)."""
+    return {
+        "min_size": int(_env(env, "POOL_MIN", 2)),
+        "max_size": int(_env(env, "POOL_MAX", 10)),
+        "timeout": float(_env(env, "POOL_TIMEOUT", 10)),            # attente max d'une connexion libre (s)
+        "max_idle": float(_env(env, "POOL_MAX_IDLE", 600)),         # fermeture des connexions inactives (s)
+        "max_lifetime": float(_env(env, "POOL_MAX_LIFETIME", 3600)),  # recyclage périodique (s)
+    }
+
+
+def postgresql_config(profile, env):
+    defaults = POSTGRESQL_DEFAULTS[profile]
+    options = {
+        "sslmode": _env(env, "SSLMODE", defaults["SSLMODE"]),
+        "connect_timeout": int(_env(env, "CONNECT_TIMEOUT", 5)),
+        # Détection des connexions coupées par le réseau ou le serveur
+        "keepalives": 1,
+        "keepalives_idle": 60,
+        "keepalives_interval": 10,
+        "keepalives_count": 3,
+    }
+    sslrootcert = _env(env, "SSLROOTCERT", defaults["SSLROOTCERT"])
+    if sslrootcert:
+        options["sslrootcert"] = sslrootcert
+
+    config = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": _env(env, "NAME", defaults["NAME"]),
+        "USER": _required(env, profile, "USER", defaults),
+        "PASSWORD": _required(env, profile, "PASSWORD", defaults),
+        "HOST": _required(env, profile, "HOST", defaults),
+        "PORT": _env(env, "PORT", defaults["PORT"]),
+        "OPTIONS": options,
+        # Vérification des connexions avant réutilisation (à l'emprunt dans le pool)
+        "CONN_HEALTH_CHECKS": True,
+    }
+
+    if pool_available() and _env(env, "POOL", "1") == "1":
+        # Le pool remplace les connexions persistantes (incompatibles avec CONN_MAX_AGE)
+        options["pool"] = pool_options(env)
+    else:
+        # Connexions persistantes : un thread par requête (WSGI) uniquement
+        asgi = env.get("SKT_ASYNC_VIEWS") == "1"
+        config["CONN_MAX_AGE"] = 0 if asgi else int(_env(env, "CONN_MAX_AGE", 600))
+    return config
+
+
+def database_config(base_dir, env=os.environ):
+    """Dictionnaire DATABASES['default'] du profil SKT_DB_PROFILE."""
+    profile = env.get("SKT_DB_PROFILE", "production")
+    if profile not in PROFILES:
+        raise ValueError(f"SKT_DB_PROFILE inconnu : {profile!r} (attendu : {', '.join(PROFILES)})")
+    if profile == "sqlite":
+        return {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": _env(env, "NAME", base_dir / "db.sqlite3"),
+        }
+    return postgresql_config(profile, env)
+
+
+def pool_stats(connections):
+    """Statistiques des pools de connexions ouverts : {alias: {statistique: valeur}}."""
+    stats = {}
+    for conn in connections.all(initialized_only=True):
+        if not conn.settings_dict.get("OPTIONS", {}).get("pool"):
+            continue
+        pool = conn.pool
+        if pool is not None:
+            stats[conn.alias] = pool.get_stats()
+    return stats
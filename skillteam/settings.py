@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -49,7 +52,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'SKT_account.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'SKT_account.staticfiles.PrecompressedStaticMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -81,30 +86,48 @@ WSGI_APPLICATION = 'skillteam.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-#DATABASES = {
-#    'default': {
-#        'ENGINE': 'django.db.backends.sqlite3',
-#        'NAME': BASE_DIR / 'db.sqlite3',
-#    }
-#}
-
+# Profil choisi par SKT_DB_PROFILE (production, local, sqlite) ; paramètres surchargeables
+# par les variables SKT_DB_* ; pool de connexions ou connexions persistantes (voir skillteam/database.py)
+# Tests sans serveur PostgreSQL : SKT_DB_PROFILE=sqlite python manage.py test SKT_account
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'SKT_DB',
-        'USER': 'avnadmin',
-        'PASSWORD': 'JY6DZs5710bvGzfKFBNl',
-        'HOST': 'postgresql-610f2bd6-oa374c0e2.database.cloud.ovh.net',       
-        'PORT': '20184',                     
-        'OPTIONS': {
-            'sslmode': 'require',           # Force SSL
-            'sslrootcert': 'C:/Users/herve/OneDrive%20-%20HBRC/Projet%20HAS/skillteam/skillteam/certs/ca-cert.pem'
-        },
-    }
+    'default': database_config(BASE_DIR),
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# En production (plusieurs workers) le cache doit être partagé : définir SKT_CACHE_URL
+# (ex. redis://127.0.0.1:6379/1). Sinon cache mémoire local au processus.
+
+if os.environ.get('SKT_CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['SKT_CACHE_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
+# Avec un cache partagé : sessions servies depuis le cache, base de données en écriture différée
+# (voir SKT_account/sessions.py). Sans cache partagé, une déconnexion ne serait vue que du worker
+# qui l'a traitée : sessions en base.
+SESSION_ENGINE = 'SKT_account.sessions' if os.environ.get('SKT_CACHE_URL') else 'django.contrib.sessions.backends.db'
+SKT_SESSION_DB_REFRESH = 300    # délai maximal (s) avant réécriture en base d'une session inchangée
+SKT_USER_CACHE_TIMEOUT = 300    # durée de vie (s) de l'utilisateur authentifié en cache (cache partagé seulement)
+
+# Permissions des utilisateurs partagées entre les requêtes, sous clé versionnée (voir SKT_account/permissions.py) ;
+# cache partagé seulement (SKT_CACHE_URL), sinon recalculées à chaque requête
+SKT_PERMISSION_CACHE = 'default'
+SKT_PERMISSION_CACHE_TIMEOUT = 3600
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -125,6 +148,11 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = "SKT_account.User"
 
+# Connexion : utilisateur, Compte, Entreprise et groupe chargés en une seule requête
+AUTHENTICATION_BACKENDS = [
+    "SKT_account.backends.LoginBackend",
+]
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -144,6 +172,18 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 
+# Construction : python manage.py collectstatic (noms hachés + variantes .gz/.br)
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "SKT_account.staticfiles.CompressedManifestStaticFilesStorage",
+    },
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -155,4 +195,48 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 SKT_URL_WEBAPP = 'skillteam.app'
 SKT_SECRET_KEY = "skillteamunesuperapplipourdeveloppersescompetences"
-SKT_URL_Timeout = '300'
+SKT_URL_TIMEOUT = 300          # durée de validité des tokens de passage (secondes)
+SKT_TOKEN_REPLAY_MAX = 100000    # nombre maximal de tokens mémorisés contre le rejeu
+
+# Pool de hachage des mots de passe (0 = hachage dans le worker web)
+SKT_HASHER_WORKERS = os.cpu_count()
+SKT_HASHER_MAX_PENDING = 4 * SKT_HASHER_WORKERS   # au-delà : réponse 503
+SKT_HASHER_TIMEOUT = 5                            # secondes
+
+# Pages de gestion : taille de page et durée de cache du nombre total de lignes (secondes)
+SKT_LISTING_PAGE_SIZE = 50
+SKT_LISTING_COUNT_TIMEOUT = 60
+# Versions des listes (ETag) et fragments de tableau en cache (secondes) : borne l'effet d'une écriture sans signal
+SKT_PAGE_CACHE_TIMEOUT = 3600
+
+# Admin : au-delà de ce nombre de lignes, total estimé par les statistiques PostgreSQL (None : toujours exact)
+SKT_ADMIN_ESTIMATED_COUNT_MIN = 10000
+
+# Recherche de comptes (admin, /comptes/search/) : longueur minimale indexable, nombre maximal de résultats
+SKT_SEARCH_MIN_LENGTH = 3
+SKT_SEARCH_MAX_LIMIT = 100
+
+# Limitation des tentatives de connexion : (nombre maximal, fenêtre glissante en secondes)
+# Le cache doit être partagé (SKT_CACHE_URL) pour que les limites valent sur tous les nœuds
+SKT_RATELIMIT_ENABLED = True
+SKT_RATELIMIT_CACHE = 'default'
+SKT_RATELIMIT_LOGIN_IP = (30, 60)      # échecs de connexion seulement
+SKT_RATELIMIT_LOGIN_EMAIL = (5, 60)    # toutes les tentatives
+# Adresse IP lue dans X-Forwarded-For : à activer seulement si le proxy HTTPS ajoute l'adresse
+# du client à cet en-tête ; SKT_RATELIMIT_PROXY_HOPS = nombre de proxys de confiance
+SKT_RATELIMIT_TRUST_FORWARDED = False
+SKT_RATELIMIT_PROXY_HOPS = 1
+
+# Mesures Prometheus (/metrics/) : jeton d'accès (« Authorization: Bearer <jeton> », /metrics/ désactivé
+# sans jeton) et seuil de journalisation des requêtes lentes
+SKT_METRICS_TOKEN = os.environ.get('SKT_METRICS_TOKEN')
+SKT_METRICS_SLOW_MS = 500
+
+# Images de profil : taille maximale, miniatures (pixels), qualité WebP, threads de traitement
+SKT_PROFILE_IMAGE_MAX = 512
+SKT_PROFILE_THUMB_SIZES = (64, 128)
+SKT_PROFILE_WEBP_QUALITY = 80
+SKT_IMAGE_WORKERS = 2
+
+# Vues asynchrones (activées par skillteam/asgi.py)
+SKT_ASYNC_VIEWS = os.environ.get('SKT_ASYNC_VIEWS') == '1'